@@ -11,15 +11,20 @@ Filter1: Database initialization and initial data population
 - If table exists and has data, do nothing
 """
 
+import io
 import os
 import sys
-import time
-import requests
+import orjson
 import psycopg2
-from psycopg2.extras import execute_values
 from psycopg2 import sql
 from datetime import datetime, timedelta, timezone
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from binance_client import (
+    ALL_TICKERS_WEIGHT, BASE_URL, DEFAULT_MAX_WORKERS, EXCHANGE_INFO_WEIGHT, KLINES_WEIGHT,
+    RATE_LIMITER, klines_to_frame, make_session, safe_get
+)
+from binance_rate_limit import BinanceBanError
 
 # Database configuration - can be overridden by environment variables
 DB_HOST = os.getenv("DB_HOST", "localhost")
@@ -31,52 +36,68 @@ DB_USER = os.getenv("DB_USER", "postgres")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "admin")
 
 # Binance API configuration
-BASE_URL = "https://api.binance.com"
 MIN_QUOTE_VOLUME = 10000
 STABLE_QUOTES = {"USDT", "BUSD", "USDC", "USD", "BTC", "ETH"}
 
-MAX_WORKERS = 10
-MAX_RETRIES = 5
-RETRY_DELAY = 3
+MAX_WORKERS = int(os.getenv("FILTER1_MAX_WORKERS", DEFAULT_MAX_WORKERS))
 BATCH_SIZE = 1000
 
+SESSION = make_session(MAX_WORKERS)
+
+# Extra klines pages of long histories are fetched here, in parallel with the
+# per-symbol workers (a separate pool, so workers never wait on their own pool)
+PAGE_EXECUTOR = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+
+# Symbols submitted to the worker pool at any one time
+MAX_IN_FLIGHT = MAX_WORKERS * 2
+
+# Rows accumulated across symbols before each COPY + commit
+FLUSH_ROWS = 10000
+
+# Name Postgres gives the table's UNIQUE(symbol, date) constraint
+UNIQUE_CONSTRAINT = "cryptosymbols_symbol_date_key"
+
+# cryptosymbols columns written by Filter1, in COPY/INSERT order. The first eight are
+# the OHLCV_FIELDS fetch_ohlcv returns; the remaining eight are constant per symbol
+# and appended as a preformatted suffix.
+INSERT_COLUMNS = (
+    'date, open, high, low, close, volume, "quoteAssetVolume", '
+    'symbol, "lastPrice_24h", "volume_24h", "quoteVolume_24h", '
+    '"high_24h", "low_24h", "baseAsset", "quoteAsset", "symbolUsed"'
+)
+
+# Statements issued by insert_symbol_data, built once instead of on every flush
+COPY_SQL = f"COPY cryptosymbols ({INSERT_COLUMNS}) FROM STDIN WITH (FORMAT csv, DELIMITER E'\\t')"
+STAGING_CREATE_SQL = f"""
+    CREATE TEMP TABLE IF NOT EXISTS tmp_cryptosymbols AS
+    SELECT {INSERT_COLUMNS} FROM cryptosymbols WITH NO DATA
+"""
+STAGING_COPY_SQL = f"COPY tmp_cryptosymbols ({INSERT_COLUMNS}) FROM STDIN WITH (FORMAT csv, DELIMITER E'\\t')"
+STAGING_INSERT_SQL = f"""
+    INSERT INTO cryptosymbols ({INSERT_COLUMNS})
+    SELECT {INSERT_COLUMNS} FROM tmp_cryptosymbols
+    ON CONFLICT (symbol, date) DO NOTHING
+"""
 
-def safe_get(session, url, params=None, timeout=20):
-    """Safe HTTP GET with retry logic"""
-    backoff = RETRY_DELAY
-    for attempt in range(1, MAX_RETRIES + 1):
-        try:
-            r = session.get(url, params=params, timeout=timeout)
-            if r.status_code == 429:
-                time.sleep(backoff)
-                backoff *= 1.7
-                continue
-            r.raise_for_status()
-            time.sleep(0.15)
-            return r
-        except Exception:
-            if attempt < MAX_RETRIES:
-                time.sleep(backoff)
-                backoff *= 1.7
-            else:
-                return None
-    return None
 
 
 def get_exchange_info(session):
     """Get exchange info with all symbols"""
-    r = safe_get(session, f"{BASE_URL}/api/v3/exchangeInfo")
+    r = safe_get(session, f"{BASE_URL}/api/v3/exchangeInfo", weight=EXCHANGE_INFO_WEIGHT)
     if not r:
         raise RuntimeError("Failed to get exchangeInfo")
-    return r.json()["symbols"]
+    info = orjson.loads(r.content)
+    # Size the request-weight budget from the limits Binance currently enforces
+    RATE_LIMITER.configure(info.get("rateLimits", []))
+    return info["symbols"]
 
 
 def get_all_tickers(session):
     """Get all 24hr ticker statistics"""
-    r = safe_get(session, f"{BASE_URL}/api/v3/ticker/24hr")
+    r = safe_get(session, f"{BASE_URL}/api/v3/ticker/24hr", weight=ALL_TICKERS_WEIGHT)
     if not r:
         raise RuntimeError("Failed to get tickers")
-    return r.json()
+    return orjson.loads(r.content)
 
 
 def fetch_ohlcv(session, symbol):
@@ -86,47 +107,44 @@ def fetch_ohlcv(session, symbol):
     since = int((datetime.now(timezone.utc) - timedelta(days=365*10)).timestamp() * 1000)
     timeframe_ms = 86400000
 
-    while True:
-        params = {"symbol": symbol, "interval": "1d", "limit": limit, "startTime": since}
-        r = safe_get(session, f"{BASE_URL}/api/v3/klines", params=params)
-        if not r:
-            break
-        batch = r.json()
-        if not batch:
-            break
-        all_rows.extend(batch)
-        last_ts = batch[-1][0]
-        if len(batch) < limit:
-            break
-        since = last_ts + timeframe_ms
-        time.sleep(0.2)
-
+    # The first page starts at the symbol's listing date (or 10 years back)
+    params = {"symbol": symbol, "interval": "1d", "limit": limit, "startTime": since}
+    r = safe_get(session, f"{BASE_URL}/api/v3/klines", params=params, weight=KLINES_WEIGHT)
+    if not r:
+        return None
+    all_rows.extend(orjson.loads(r.content))
     if not all_rows:
         return None
 
-    # Convert to our format
-    result = []
-    for row in all_rows:
-        dt = datetime.fromtimestamp(row[0] / 1000, tz=timezone.utc).date()
-        result.append({
-            "date": dt,
-            "open": float(row[1]) if row[1] else 0.0,
-            "high": float(row[2]) if row[2] else 0.0,
-            "low": float(row[3]) if row[3] else 0.0,
-            "close": float(row[4]) if row[4] else 0.0,
-            "volume": float(row[5]) if row[5] else 0.0,
-            "quoteAssetVolume": float(row[7]) if row[7] else 0.0,
-            "symbol": symbol
-        })
-    return result
-
-
-def fetch_ticker(session, symbol):
-    """Fetch 24hr ticker data for a symbol"""
-    r = safe_get(session, f"{BASE_URL}/api/v3/ticker/24hr", params={"symbol": symbol})
-    if not r:
-        return {}
-    t = r.json()
+    # A full first page means more history: the remaining page start times are
+    # known now, so fetch those pages concurrently instead of one after another
+    if len(all_rows) == limit:
+        page_ms = limit * timeframe_ms
+        now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+        page_starts = range(all_rows[-1][0] + timeframe_ms, now_ms + 1, page_ms)
+
+        def fetch_page(start_ts):
+            params = {"symbol": symbol, "interval": "1d", "limit": limit,
+                      "startTime": start_ts, "endTime": start_ts + page_ms - 1}
+            r = safe_get(session, f"{BASE_URL}/api/v3/klines", params=params, weight=KLINES_WEIGHT)
+            return orjson.loads(r.content) if r else None
+
+        # A page that fails after safe_get's retries would leave a gap mid-history
+        # that Filter2/Filter3 (which only look at MAX(date)) never backfill, so
+        # drop the whole symbol rather than store partial history
+        for batch in PAGE_EXECUTOR.map(fetch_page, page_starts):
+            if batch is None:
+                print(f"⚠️  {symbol}: a klines page failed, skipping symbol")
+                return None
+            all_rows.extend(batch)
+        # Pages come back in start-time order; sort anyway in case of overlaps at the edges
+        all_rows.sort(key=lambda row: row[0])
+
+    return klines_to_frame(all_rows, symbol)
+
+
+def parse_ticker(t):
+    """Extract the 24hr ticker fields stored with each row"""
     return {
         "lastPrice_24h": float(t.get("lastPrice", 0)) if t.get("lastPrice") else 0.0,
         "volume_24h": float(t.get("volume", 0)) if t.get("volume") else 0.0,
@@ -137,50 +155,43 @@ def fetch_ticker(session, symbol):
 
 
 def process_symbol(symbol_info, ticker_map):
-    """Process one symbol - download data and return rows"""
-    session = requests.Session()
-    try:
-        if symbol_info["status"] != "TRADING":
-            return None
-        
-        symbol = symbol_info["symbol"]
-        base_asset = symbol_info["baseAsset"]
-        quote_asset = symbol_info["quoteAsset"]
-        
-        # Fetch OHLCV data
-        ohlcv_data = fetch_ohlcv(session, symbol)
-        if not ohlcv_data:
-            return None
-        
-        # Fetch ticker data
-        ticker = fetch_ticker(session, symbol)
-        
-        # Apply filter1 logic: filter out invalid symbols
-        # LastPrice_24h > 0, QuoteVolume_24h >= MIN_QUOTE_VOLUME, QuoteAsset in STABLE_QUOTES
-        if (ticker.get("lastPrice_24h", 0) <= 0 or
-            ticker.get("quoteVolume_24h", 0) < MIN_QUOTE_VOLUME or
-            quote_asset not in STABLE_QUOTES):
-            return None  # Symbol doesn't pass filter1 criteria
-        
-        # Symbol is valid, enrich all rows with ticker data
-        valid_rows = []
-        for row in ohlcv_data:
-                # Enrich row with ticker data
-                row.update({
-                    "lastPrice_24h": ticker.get("lastPrice_24h", 0.0),
-                    "volume_24h": ticker.get("volume_24h", 0.0),
-                    "quoteVolume_24h": ticker.get("quoteVolume_24h", 0.0),
-                    "high_24h": ticker.get("high_24h", 0.0),
-                    "low_24h": ticker.get("low_24h", 0.0),
-                    "baseAsset": base_asset,
-                    "quoteAsset": quote_asset,
-                    "symbolUsed": symbol
-                })
-                valid_rows.append(row)
-        
-        return valid_rows if valid_rows else None
-    finally:
-        session.close()
+    """Process one symbol - download data and return (COPY text in INSERT_COLUMNS order, row count)"""
+    if symbol_info["status"] != "TRADING":
+        return None
+    
+    symbol = symbol_info["symbol"]
+    base_asset = symbol_info["baseAsset"]
+    quote_asset = symbol_info["quoteAsset"]
+    
+    # Ticker data from the /ticker/24hr snapshot main() already downloaded
+    ticker = ticker_map.get(symbol, {})
+    
+    # Apply filter1 logic before downloading, so rejected symbols cost no HTTP calls
+    # LastPrice_24h > 0, QuoteVolume_24h >= MIN_QUOTE_VOLUME, QuoteAsset in STABLE_QUOTES
+    if (ticker.get("lastPrice_24h", 0) <= 0 or
+        ticker.get("quoteVolume_24h", 0) < MIN_QUOTE_VOLUME or
+        quote_asset not in STABLE_QUOTES):
+        return None  # Symbol doesn't pass filter1 criteria
+    
+    # Fetch OHLCV data
+    df = fetch_ohlcv(SESSION, symbol)
+    if df is None or df.empty:
+        return None
+    
+    # Symbol is valid, enrich all rows with ticker data. Those columns are the same on
+    # every row, so format them once and splice the suffix onto each CSV line
+    suffix = "\t".join(str(value) for value in (
+        ticker.get("lastPrice_24h", 0.0),
+        ticker.get("volume_24h", 0.0),
+        ticker.get("quoteVolume_24h", 0.0),
+        ticker.get("high_24h", 0.0),
+        ticker.get("low_24h", 0.0),
+        base_asset or "",
+        quote_asset or "",
+        symbol
+    ))
+    text = df.to_csv(sep="\t", header=False, index=False, lineterminator="\n")
+    return text.replace("\n", f"\t{suffix}\n"), len(df)
 
 
 def create_database_if_not_exists():
@@ -244,6 +255,12 @@ def create_table_if_not_exists(conn):
                 UNIQUE(symbol, date)
             )
         """)
+        # Holds one row once the initial load has finished (see mark_initial_load_complete)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS initial_load (
+                completed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
         conn.commit()
         print("✅ Table cryptoSymbols created or already exists")
         return True
@@ -267,46 +284,73 @@ def table_has_data(conn):
         cursor.close()
 
 
-def insert_symbol_data(conn, data_rows):
-    """Insert symbol data into cryptoSymbols table"""
-    if not data_rows:
+def initial_load_complete(conn):
+    """Check whether a previous run finished the initial load"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT 1 FROM initial_load LIMIT 1")
+        return cursor.fetchone() is not None
+    finally:
+        cursor.close()
+
+
+def loaded_symbols(conn):
+    """Return the set of symbols that already have rows in cryptoSymbols
+    
+    Each flush commits whole symbols, so a symbol with any rows was loaded completely.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT DISTINCT symbol FROM cryptosymbols")
+        return {row[0] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+def mark_initial_load_complete(conn):
+    """Record that the initial load finished, so later runs skip data population"""
+    cursor = conn.cursor()
+    try:
+        # Durable commit: the marker must not outlive rows lost with an async commit
+        cursor.execute("SET synchronous_commit = on")
+        cursor.execute("INSERT INTO initial_load DEFAULT VALUES")
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"⚠️  Could not record the completed initial load (the next run resumes it): {e}")
+        return False
+    finally:
+        cursor.close()
+
+
+def insert_symbol_data(conn, copy_text, row_count, bulk_load=False):
+    """Insert symbol data into cryptoSymbols table via COPY
+    
+    copy_text holds row_count tab-separated lines in INSERT_COLUMNS order. Normally
+    rows are COPYed into a temp staging table and inserted with ON CONFLICT
+    DO NOTHING. With bulk_load (unique constraint dropped by begin_bulk_load) they are
+    COPYed straight into cryptosymbols and duplicates are removed afterwards.
+    
+    Returns the number of rows inserted, or None if the insert failed and was rolled back.
+    """
+    if not row_count:
         return 0
     
     cursor = conn.cursor()
     try:
-        insert_query = """
-            INSERT INTO cryptosymbols (
-                date, open, high, low, close, volume, "quoteAssetVolume",
-                symbol, "lastPrice_24h", "volume_24h", "quoteVolume_24h",
-                "high_24h", "low_24h", "baseAsset", "quoteAsset", "symbolUsed"
-            ) VALUES %s
-            ON CONFLICT (symbol, date) DO NOTHING
-        """
-        
-        values = [
-            (
-                row["date"],
-                row["open"],
-                row["high"],
-                row["low"],
-                row["close"],
-                row["volume"],
-                row["quoteAssetVolume"],
-                row["symbol"],
-                row["lastPrice_24h"],
-                row["volume_24h"],
-                row["quoteVolume_24h"],
-                row["high_24h"],
-                row["low_24h"],
-                row.get("baseAsset") or "",
-                row.get("quoteAsset") or "",
-                row["symbolUsed"]
-            )
-            for row in data_rows
-        ]
+        buf = io.StringIO(copy_text)
         
-        execute_values(cursor, insert_query, values)
-        inserted_count = cursor.rowcount
+        if bulk_load:
+            cursor.copy_expert(COPY_SQL, buf)
+            inserted_count = row_count
+        else:
+            # COPY has no ON CONFLICT, so stage rows in a temp table and dedup on the way in
+            cursor.execute(STAGING_CREATE_SQL)
+            cursor.copy_expert(STAGING_COPY_SQL, buf)
+            cursor.execute(STAGING_INSERT_SQL)
+            inserted_count = cursor.rowcount
+            cursor.execute("TRUNCATE tmp_cryptosymbols")
         conn.commit()
         return inserted_count
     except Exception as e:
@@ -314,11 +358,101 @@ def insert_symbol_data(conn, data_rows):
         print(f"❌ Error inserting data: {e}")
         import traceback
         traceback.print_exc()
-        return 0
+        return None
     finally:
         cursor.close()
 
 
+def begin_bulk_load(conn):
+    """Prepare the empty table for the initial load: drop the (symbol, date) unique
+    constraint so rows skip its index maintenance, and relax commit durability
+    
+    Returns True if the constraint was dropped (finish_bulk_load must restore it).
+    """
+    cursor = conn.cursor()
+    try:
+        # Lost commits on a crash are harmless here: until mark_initial_load_complete
+        # runs, every startup resumes the load and refetches symbols with no rows
+        cursor.execute("SET synchronous_commit = off")
+        cursor.execute(f"ALTER TABLE cryptosymbols DROP CONSTRAINT IF EXISTS {UNIQUE_CONSTRAINT}")
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"⚠️  Could not drop unique constraint, loading with it live: {e}")
+        return False
+    finally:
+        cursor.close()
+
+
+def finish_bulk_load(conn):
+    """Remove duplicate (symbol, date) rows and restore the unique constraint if it is missing
+    
+    Also run on later startups, so an interrupted initial load never leaves the
+    table without its constraint. Returns the number of duplicate rows deleted,
+    or None if the constraint could not be restored.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT 1 FROM pg_constraint WHERE conrelid = 'cryptosymbols'::regclass AND conname = %s",
+            (UNIQUE_CONSTRAINT,)
+        )
+        if cursor.fetchone():
+            return 0
+        cursor.execute("""
+            DELETE FROM cryptosymbols
+            WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, row_number() OVER (PARTITION BY symbol, date ORDER BY id) AS rn
+                    FROM cryptosymbols
+                ) ranked
+                WHERE rn > 1
+            )
+        """)
+        deleted = cursor.rowcount
+        # The table isn't being read yet, so build the index in one pass (no CONCURRENTLY)
+        cursor.execute(f"ALTER TABLE cryptosymbols ADD CONSTRAINT {UNIQUE_CONSTRAINT} UNIQUE (symbol, date)")
+        conn.commit()
+        print(f"✅ Restored unique constraint on (symbol, date) ({deleted} duplicate rows removed)")
+        return deleted
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Error restoring unique constraint on (symbol, date): {e}")
+        return None
+    finally:
+        cursor.close()
+
+
+def flush_rows(conn, pending_chunks, bulk_load=False):
+    """Insert the accumulated (symbol, COPY text, row count) chunks in one batch
+    
+    If the batch fails, each symbol's chunk is retried on its own, so one bad symbol
+    doesn't roll back the rest. Returns (rows inserted, symbols that failed to insert).
+    """
+    if not pending_chunks:
+        return 0, []
+    row_count = sum(count for _, _, count in pending_chunks)
+    inserted = insert_symbol_data(conn, "".join(text for _, text, _ in pending_chunks), row_count, bulk_load)
+    failed_symbols = []
+    if inserted is None:
+        print(f"⚠️  Batch insert of {len(pending_chunks)} symbols failed, retrying each symbol on its own")
+        inserted = 0
+        for symbol, text, count in pending_chunks:
+            symbol_inserted = insert_symbol_data(conn, text, count, bulk_load)
+            if symbol_inserted is None:
+                failed_symbols.append(symbol)
+            else:
+                inserted += symbol_inserted
+        if failed_symbols:
+            print(f"❌ Failed to insert {len(failed_symbols)} symbol(s): {', '.join(failed_symbols)}")
+    if inserted < row_count:
+        print(f"💾 Inserted {inserted} of {row_count} rows ({row_count - inserted} duplicates or failed)")
+    else:
+        print(f"💾 Inserted {inserted} rows")
+    return inserted, failed_symbols
+
+
 def main():
     print("🚀 Starting Filter1: Database initialization and data population")
     
@@ -350,78 +484,116 @@ def main():
             print("❌ Failed to create table")
             sys.exit(1)
         
-        # Step 4: Check if table has data
+        # Step 4: Check if the initial load already finished
         print("🔍 Checking if table 'cryptoSymbols' contains data...")
-        if table_has_data(conn):
-            print("✅ Table cryptoSymbols already contains data. Skipping data population.")
+        # Finish any initial load that was interrupted before restoring the constraint;
+        # Filter3's ON CONFLICT (symbol, date) upserts fail without it
+        if finish_bulk_load(conn) is None:
+            sys.exit(1)
+        if initial_load_complete(conn):
+            print("✅ Initial load of cryptoSymbols already completed. Skipping data population.")
             return
-        print("📝 Table is empty or newly created. Proceeding with data population...")
+        # An interrupted load (crash, kill, Binance ban) left some symbols behind: resume it
+        done_symbols = loaded_symbols(conn) if table_has_data(conn) else set()
+        if done_symbols:
+            print(f"📝 Resuming an interrupted initial load ({len(done_symbols)} symbols already loaded)...")
+        else:
+            print("📝 Table is empty or newly created. Proceeding with data population...")
         
         # Step 5: Get exchange info and tickers (crypto_downloader logic)
         print("📥 Fetching exchange info and ticker data from Binance...")
-        session = requests.Session()
-        try:
-            symbols = get_exchange_info(session)
-            tickers = get_all_tickers(session)
-            print(f"🪙 Total symbols: {len(symbols)}")
-            
-            # Map symbol → ticker data
-            ticker_map = {}
-            for t in tickers:
-                ticker_map[t["symbol"]] = {
-                    "quoteVolume": float(t.get("quoteVolume") or 0)
-                }
-            
-            # Rank symbols by quoteVolume descending, take top 1000
-            symbols_sorted = sorted(
-                [s for s in symbols if s["status"] == "TRADING"],
-                key=lambda s: ticker_map.get(s["symbol"], {}).get("quoteVolume", 0),
-                reverse=True
-            )
-            top_symbols = symbols_sorted[:1000]
-            print(f"📌 Top 1000 symbols selected based on quoteVolume")
-            
-        finally:
-            session.close()
+        symbols = get_exchange_info(SESSION)
+        tickers = get_all_tickers(SESSION)
+        print(f"🪙 Total symbols: {len(symbols)}")
+        
+        # Map symbol → ticker data (used for ranking and stored with every row)
+        ticker_map = {t["symbol"]: parse_ticker(t) for t in tickers}
+        
+        # Rank symbols by quoteVolume descending, take top 1000
+        symbols_sorted = sorted(
+            [s for s in symbols if s["status"] == "TRADING"],
+            key=lambda s: ticker_map.get(s["symbol"], {}).get("quoteVolume_24h", 0),
+            reverse=True
+        )
+        top_symbols = [s for s in symbols_sorted[:1000] if s["symbol"] not in done_symbols]
+        print(f"📌 Top 1000 symbols selected based on quoteVolume")
         
         # Step 6: Process symbols and insert valid data (with filter1 filtering)
         print(f"📊 Processing {len(top_symbols)} symbols and applying filter1 validation...")
         total_inserted = 0
         valid_symbols_count = 0
+        # Symbols whose rows could not be inserted; the next run resumes the load for them
+        failed_symbols = []
+        # Rows from several symbols, flushed in one COPY + commit once FLUSH_ROWS is reached
+        pending_chunks = []
+        pending_count = 0
+        # A resumed load keeps the constraint live; its rows go through the dedup path
+        bulk_load = begin_bulk_load(conn) if not done_symbols else False
         
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            futures = {
-                executor.submit(process_symbol, s, ticker_map): s 
-                for s in top_symbols
-            }
+        try:
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                queued = deque(top_symbols)
+                in_flight = {}
+                
+                completed = 0
+                while queued or in_flight:
+                    # Submit only a bounded window of symbols, so finished results
+                    # are handled and released instead of piling up in futures
+                    while queued and len(in_flight) < MAX_IN_FLIGHT:
+                        s = queued.popleft()
+                        in_flight[executor.submit(process_symbol, s, ticker_map)] = s
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        symbol_info = in_flight.pop(future)
+                        symbol = symbol_info["symbol"]
+                        try:
+                            result = future.result()
+                            if result:
+                                text, row_count = result
+                                pending_chunks.append((symbol, text, row_count))
+                                pending_count += row_count
+                                valid_symbols_count += 1
+                                print(f"✅ {symbol}: Fetched {row_count} rows")
+                                if pending_count >= FLUSH_ROWS:
+                                    inserted, failed = flush_rows(conn, pending_chunks, bulk_load)
+                                    total_inserted += inserted
+                                    failed_symbols += failed
+                                    pending_chunks = []
+                                    pending_count = 0
+                            else:
+                                print(f"⚠️  {symbol}: No valid data (filtered out by filter1 criteria)")
+                            completed += 1
+                            if completed % 50 == 0:
+                                print(f"Progress: {completed}/{len(top_symbols)} symbols - {total_inserted} rows inserted, {valid_symbols_count} valid symbols")
+                        except BinanceBanError:
+                            raise
+                        except Exception as e:
+                            print(f"❌ Error processing {symbol}: {e}")
+                            import traceback
+                            traceback.print_exc()
             
-            completed = 0
-            for future in as_completed(futures):
-                symbol_info = futures[future]
-                symbol = symbol_info["symbol"]
-                try:
-                    data_rows = future.result()
-                    if data_rows:
-                        inserted = insert_symbol_data(conn, data_rows)
-                        total_inserted += inserted
-                        valid_symbols_count += 1
-                        if inserted == 0:
-                            print(f"⚠️  {symbol}: Fetched {len(data_rows)} rows but 0 were inserted (may be duplicates)")
-                        else:
-                            print(f"✅ {symbol}: Inserted {inserted} rows")
-                    else:
-                        print(f"⚠️  {symbol}: No valid data (filtered out by filter1 criteria)")
-                    completed += 1
-                    if completed % 50 == 0:
-                        print(f"Progress: {completed}/{len(top_symbols)} symbols - {total_inserted} rows inserted, {valid_symbols_count} valid symbols")
-                except Exception as e:
-                    print(f"❌ Error processing {symbol}: {e}")
-                    import traceback
-                    traceback.print_exc()
+            inserted, failed = flush_rows(conn, pending_chunks, bulk_load)
+            total_inserted += inserted
+            failed_symbols += failed
+        finally:
+            if bulk_load:
+                deleted = finish_bulk_load(conn)
+                if deleted is None:
+                    sys.exit(1)
+                total_inserted -= deleted
         
+        if failed_symbols:
+            print(f"❌ {len(failed_symbols)} symbol(s) could not be inserted; the next run retries them")
+            sys.exit(1)
+        mark_initial_load_complete(conn)
         print(f"✅ Filter1 completed! Inserted {total_inserted} rows from {valid_symbols_count} valid symbols into cryptoSymbols table")
         
+    except BinanceBanError as e:
+        print(f"❌ {e}; stopping")
+        sys.exit(1)
     finally:
+        PAGE_EXECUTOR.shutdown()
+        SESSION.close()
         conn.close()
 
 
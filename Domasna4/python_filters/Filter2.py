@@ -46,32 +46,24 @@ def update_latest_dates(conn):
     """Update latestInfo table with latest available date for each symbol"""
     cursor = conn.cursor()
     try:
-        # First, get all symbols and their latest dates from cryptoSymbols
+        # Aggregate and upsert server-side in a single statement
         cursor.execute("""
-            SELECT symbol, MAX(date) as last_available_date
+            INSERT INTO latestInfo (symbol, last_available_date)
+            SELECT symbol, MAX(date)
             FROM cryptosymbols
             GROUP BY symbol
+            ON CONFLICT (symbol)
+            DO UPDATE SET last_available_date = EXCLUDED.last_available_date
+            RETURNING symbol, last_available_date
         """)
         
-        symbol_dates = cursor.fetchall()
+        updated_symbols = sorted(cursor.fetchall())
+        conn.commit()
         
-        if not symbol_dates:
+        if not updated_symbols:
             print("⚠️  No symbols found in cryptoSymbols table")
             return 0
         
-        # Insert/update each symbol's latest date
-        updated_symbols = []
-        for symbol, last_date in symbol_dates:
-            cursor.execute("""
-                INSERT INTO latestInfo (symbol, last_available_date)
-                VALUES (%s, %s)
-                ON CONFLICT (symbol) 
-                DO UPDATE SET last_available_date = EXCLUDED.last_available_date
-            """, (symbol, last_date))
-            updated_symbols.append((symbol, last_date))
-        
-        conn.commit()
-        
         # Print each updated symbol
         print(f"✅ Updated latest dates for {len(updated_symbols)} symbols:")
         for symbol, last_date in updated_symbols:
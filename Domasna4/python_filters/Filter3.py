@@ -9,14 +9,21 @@ Filter3: Fill missing daily data
 - If this date is not yesterday (today-1), fetch the missing daily data and insert it
 """
 
+import io
 import os
 import sys
-import time
-import requests
+import threading
+from queue import Queue
+import orjson
 import psycopg2
 from psycopg2.extras import execute_values
+from psycopg2 import sql
 from datetime import datetime, timedelta, timezone
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from binance_client import (
+    ALL_TICKERS_WEIGHT, BASE_URL, DEFAULT_MAX_WORKERS, KLINES_WEIGHT, klines_to_frame, make_session, safe_get
+)
+from binance_rate_limit import BinanceBanError
 
 # Database configuration - can be overridden by environment variables
 DB_HOST = os.getenv("DB_HOST", "localhost")
@@ -26,33 +33,35 @@ DB_USER = os.getenv("DB_USER", "postgres")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "admin")
 
 # Binance API configuration
-BASE_URL = "https://api.binance.com"
-MAX_WORKERS = 10
-MAX_RETRIES = 5
-RETRY_DELAY = 2
+MAX_WORKERS = int(os.getenv("FILTER3_MAX_WORKERS", DEFAULT_MAX_WORKERS))
 BATCH_SIZE = 1000
+# Symbols inserted per transaction by each writer; latestInfo is updated in the same commit
+COMMIT_BATCH_SYMBOLS = 50
 
+# Above this many estimated new rows, secondary indexes are dropped during the load
+BULK_LOAD_ROW_THRESHOLD = 50000
+
+# Database writer threads draining fetched results while fetching continues
+DB_WRITER_THREADS = 2
+RESULT_QUEUE_SIZE = 64
+
+SESSION = make_session(MAX_WORKERS)
+
+# Per-row OHLCV columns staged through COPY; the per-symbol ticker and asset
+# columns are bound once per symbol in the INSERT ... SELECT
+OHLCV_COLUMNS = 'date, open, high, low, close, volume, "quoteAssetVolume", symbol'
+
+
+def connect_db():
+    """Open a new connection to the cryptoCoins database"""
+    return psycopg2.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME
+    )
 
-def safe_get(session, url, params=None, timeout=20):
-    """Safe HTTP GET with retry logic"""
-    backoff = RETRY_DELAY
-    for attempt in range(1, MAX_RETRIES + 1):
-        try:
-            r = session.get(url, params=params, timeout=timeout)
-            if r.status_code == 429:
-                time.sleep(backoff)
-                backoff *= 1.7
-                continue
-            r.raise_for_status()
-            time.sleep(0.15)
-            return r
-        except Exception:
-            if attempt < MAX_RETRIES:
-                time.sleep(backoff)
-                backoff *= 1.7
-            else:
-                return None
-    return None
 
 
 def fetch_ohlcv_range(session, symbol, start_date, end_date):
@@ -70,95 +79,50 @@ def fetch_ohlcv_range(session, symbol, start_date, end_date):
             "endTime": min(start_ts + BATCH_SIZE * timeframe_ms - 1, end_ts),
             "limit": BATCH_SIZE
         }
-        r = safe_get(session, f"{BASE_URL}/api/v3/klines", params=params)
+        r = safe_get(session, f"{BASE_URL}/api/v3/klines", params=params, weight=KLINES_WEIGHT)
         if not r:
             break
-        batch = r.json()
+        batch = orjson.loads(r.content)
         if not batch:
             break
-        for row in batch:
-            dt = datetime.fromtimestamp(row[0] / 1000, tz=timezone.utc).date()
-            all_rows.append({
-                "date": dt,
-                "open": float(row[1]) if row[1] else 0.0,
-                "high": float(row[2]) if row[2] else 0.0,
-                "low": float(row[3]) if row[3] else 0.0,
-                "close": float(row[4]) if row[4] else 0.0,
-                "volume": float(row[5]) if row[5] else 0.0,
-                "quoteAssetVolume": float(row[7]) if row[7] else 0.0,
-                "symbol": symbol
-            })
+        all_rows.extend(batch)
         if len(batch) < BATCH_SIZE:
             break
         start_ts = batch[-1][0] + timeframe_ms
-        time.sleep(0.2)
 
-    return all_rows
+    if not all_rows:
+        return None
+
+    return klines_to_frame(all_rows, symbol)
 
 
-def fetch_ticker(session, symbol):
-    """Fetch 24hr ticker data for a symbol"""
-    r = safe_get(session, f"{BASE_URL}/api/v3/ticker/24hr", params={"symbol": symbol})
+def fetch_tickers(session, symbols):
+    """Fetch 24hr ticker data for the given symbols with a single request"""
+    r = safe_get(session, f"{BASE_URL}/api/v3/ticker/24hr", weight=ALL_TICKERS_WEIGHT)
     if not r:
         return {}
-    t = r.json()
-    return {
-        "lastPrice_24h": float(t.get("lastPrice", 0)) if t.get("lastPrice") else 0.0,
-        "volume_24h": float(t.get("volume", 0)) if t.get("volume") else 0.0,
-        "quoteVolume_24h": float(t.get("quoteVolume", 0)) if t.get("quoteVolume") else 0.0,
-        "high_24h": float(t.get("highPrice", 0)) if t.get("highPrice") else 0.0,
-        "low_24h": float(t.get("lowPrice", 0)) if t.get("lowPrice") else 0.0
-    }
+    wanted = set(symbols)
+    tickers = {}
+    for t in orjson.loads(r.content):
+        if t.get("symbol") not in wanted:
+            continue
+        tickers[t["symbol"]] = {
+            "lastPrice_24h": float(t.get("lastPrice", 0)) if t.get("lastPrice") else 0.0,
+            "volume_24h": float(t.get("volume", 0)) if t.get("volume") else 0.0,
+            "quoteVolume_24h": float(t.get("quoteVolume", 0)) if t.get("quoteVolume") else 0.0,
+            "high_24h": float(t.get("highPrice", 0)) if t.get("highPrice") else 0.0,
+            "low_24h": float(t.get("lowPrice", 0)) if t.get("lowPrice") else 0.0
+        }
+    return tickers
 
 
 def process_symbol(symbol, start_date, end_date):
-    """Process a single symbol and return data rows"""
-    session = requests.Session()
-    try:
-        ohlcv_data = fetch_ohlcv_range(session, symbol, start_date, end_date)
-        if not ohlcv_data:
-            return []
-        
-        ticker = fetch_ticker(session, symbol)
-        
-        # Enrich OHLCV data with ticker info
-        for row in ohlcv_data:
-            row.update({
-                "lastPrice_24h": ticker.get("lastPrice_24h", 0.0),
-                "volume_24h": ticker.get("volume_24h", 0.0),
-                "quoteVolume_24h": ticker.get("quoteVolume_24h", 0.0),
-                "high_24h": ticker.get("high_24h", 0.0),
-                "low_24h": ticker.get("low_24h", 0.0),
-                "baseAsset": symbol[:-4] if len(symbol) > 4 else symbol,
-                "quoteAsset": symbol[-4:] if len(symbol) > 4 else "",
-                "symbolUsed": symbol
-            })
-        
-        return ohlcv_data
-    finally:
-        session.close()
-
-
-def get_symbols_with_missing_data(conn, yesterday):
-    """Get symbols that need data updates (last_available_date < yesterday) from latestInfo"""
-    cursor = conn.cursor()
-    try:
-        # Read last_available_date from latestInfo table for each symbol
-        # Only get symbols where last_available_date < yesterday (not equal)
-        cursor.execute("""
-            SELECT symbol, last_available_date
-            FROM latestInfo
-            WHERE last_available_date < %s
-        """, (yesterday,))
-        
-        results = cursor.fetchall()
-        return [(row[0], row[1]) for row in results]
-    finally:
-        cursor.close()
+    """Process a single symbol and return its OHLCV rows as a DataFrame"""
+    return fetch_ohlcv_range(SESSION, symbol, start_date, end_date)
 
 
-def get_all_symbols_status(conn, yesterday):
-    """Get all symbols and their status for logging"""
+def get_all_symbols_status(conn):
+    """Get all symbols and their last_available_date from latestInfo"""
     cursor = conn.cursor()
     try:
         cursor.execute("""
@@ -171,71 +135,263 @@ def get_all_symbols_status(conn, yesterday):
         cursor.close()
 
 
-def insert_symbol_data(conn, data_rows):
-    """Insert symbol data into cryptoSymbols table"""
-    if not data_rows:
+def insert_symbol_data(conn, df, ticker):
+    """Insert symbol data into cryptoSymbols table via COPY into a temp staging table
+
+    Runs inside the caller's open transaction (guarded by a savepoint); the caller commits.
+    """
+    if df is None or df.empty:
         return 0
     
     cursor = conn.cursor()
+    cursor.execute("SAVEPOINT insert_symbol")
     try:
-        insert_query = """
+        # COPY has no ON CONFLICT, so stage rows in a temp table and dedup on the way in
+        cursor.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS tmp_cryptosymbols AS
+            SELECT {OHLCV_COLUMNS} FROM cryptosymbols WITH NO DATA
+        """)
+        
+        buf = io.StringIO()
+        df.to_csv(buf, sep="\t", header=False, index=False)
+        buf.seek(0)
+        
+        cursor.copy_expert(
+            f"COPY tmp_cryptosymbols ({OHLCV_COLUMNS}) FROM STDIN WITH (FORMAT csv, DELIMITER E'\\t')",
+            buf
+        )
+        # The per-row ticker/asset columns are read by the backend; they are the same on
+        # every row of a symbol, so bind them once instead of shipping them per row
+        symbol = df["symbol"].iat[0]
+        cursor.execute(f"""
             INSERT INTO cryptosymbols (
-                date, open, high, low, close, volume, "quoteAssetVolume",
-                symbol, "lastPrice_24h", "volume_24h", "quoteVolume_24h",
+                {OHLCV_COLUMNS}, "lastPrice_24h", "volume_24h", "quoteVolume_24h",
                 "high_24h", "low_24h", "baseAsset", "quoteAsset", "symbolUsed"
-            ) VALUES %s
-            ON CONFLICT (symbol, date) DO NOTHING
-        """
-        
-        values = [
-            (
-                row["date"],
-                row["open"],
-                row["high"],
-                row["low"],
-                row["close"],
-                row["volume"],
-                row["quoteAssetVolume"],
-                row["symbol"],
-                row["lastPrice_24h"],
-                row["volume_24h"],
-                row["quoteVolume_24h"],
-                row["high_24h"],
-                row["low_24h"],
-                row.get("baseAsset") or "",
-                row.get("quoteAsset") or "",
-                row["symbolUsed"]
             )
-            for row in data_rows
-        ]
-        
-        execute_values(cursor, insert_query, values)
-        conn.commit()
-        return len(values)
+            SELECT {OHLCV_COLUMNS}, %s, %s, %s, %s, %s, %s, %s, symbol
+            FROM tmp_cryptosymbols
+            ON CONFLICT (symbol, date) DO NOTHING
+        """, (
+            ticker.get("lastPrice_24h", 0.0),
+            ticker.get("volume_24h", 0.0),
+            ticker.get("quoteVolume_24h", 0.0),
+            ticker.get("high_24h", 0.0),
+            ticker.get("low_24h", 0.0),
+            symbol[:-4] if len(symbol) > 4 else symbol,
+            symbol[-4:] if len(symbol) > 4 else ""
+        ))
+        inserted_count = cursor.rowcount
+        cursor.execute("TRUNCATE tmp_cryptosymbols")
+        cursor.execute("RELEASE SAVEPOINT insert_symbol")
+        return inserted_count
     except Exception as e:
-        conn.rollback()
+        cursor.execute("ROLLBACK TO SAVEPOINT insert_symbol")
         print(f"❌ Error inserting data for symbol: {e}")
         return 0
     finally:
         cursor.close()
 
 
-def update_latest_date(conn, symbol, new_date):
-    """Update latestInfo table with new latest date for a symbol"""
+def update_latest_dates(conn, updates):
+    """Upsert latestInfo rows for a batch of (symbol, new_date) pairs (caller commits)"""
+    if not updates:
+        return
+    
     cursor = conn.cursor()
     try:
-        cursor.execute("""
+        execute_values(cursor, """
             INSERT INTO latestInfo (symbol, last_available_date)
-            VALUES (%s, %s)
+            VALUES %s
             ON CONFLICT (symbol) 
             DO UPDATE SET last_available_date = EXCLUDED.last_available_date
-        """, (symbol, new_date))
+        """, updates, page_size=1000)
+    finally:
+        cursor.close()
+
+
+def commit_batch(conn, pending_updates):
+    """Record latestInfo for the batch and commit it together with its inserted rows; True on success"""
+    try:
+        update_latest_dates(conn, pending_updates)
+        conn.commit()
+        return True
+    except Exception as e:
+        try:
+            conn.rollback()
+        except Exception:
+            # A dropped connection can't roll back either; the server discards the transaction
+            pass
+        print(f"❌ Error committing batch of {len(pending_updates)} symbol(s): {e}")
+        return False
+
+
+def create_deferred_indexes_table_if_not_exists(cursor):
+    """Create deferred_indexes, holding definitions of cryptosymbols indexes dropped until rebuilt"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS deferred_indexes (
+            index_name VARCHAR(255) PRIMARY KEY,
+            index_def TEXT NOT NULL,
+            dropped_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+
+
+def drop_secondary_indexes(conn):
+    """Drop non-unique indexes on cryptosymbols and return how many were dropped
+    
+    Their definitions are recorded in deferred_indexes in the same transaction as
+    the drops, so a crash before recreate_indexes still leaves them to be rebuilt
+    on the next startup.
+    """
+    cursor = conn.cursor()
+    try:
+        create_deferred_indexes_table_if_not_exists(cursor)
+        cursor.execute("""
+            SELECT c.relname, pg_get_indexdef(x.indexrelid)
+            FROM pg_index x
+            JOIN pg_class c ON c.oid = x.indexrelid
+            WHERE x.indrelid = 'cryptosymbols'::regclass
+              AND NOT x.indisunique
+              AND NOT x.indisprimary
+        """)
+        index_defs = cursor.fetchall()
+        if index_defs:
+            execute_values(cursor, """
+                INSERT INTO deferred_indexes (index_name, index_def) VALUES %s
+                ON CONFLICT (index_name) DO NOTHING
+            """, index_defs)
+        for index_name, _ in index_defs:
+            cursor.execute(sql.SQL("DROP INDEX IF EXISTS {}").format(sql.Identifier(index_name)))
         conn.commit()
+        return len(index_defs)
     except Exception as e:
         conn.rollback()
-        print(f"❌ Error updating latest date for {symbol}: {e}")
+        print(f"⚠️  Could not drop secondary indexes, loading with indexes live: {e}")
+        return 0
+    finally:
+        cursor.close()
+
+
+def rebuild_index(cursor, index_name, index_def):
+    """Build one index concurrently, replacing any invalid copy and never leaving one behind"""
+    drop_index = sql.SQL("DROP INDEX CONCURRENTLY IF EXISTS {}").format(sql.Identifier(index_name))
+    cursor.execute(drop_index)
+    try:
+        # " INDEX " also matches CREATE UNIQUE INDEX definitions
+        cursor.execute(index_def.replace(" INDEX ", " INDEX CONCURRENTLY ", 1))
+    except Exception:
+        # A failed CREATE INDEX CONCURRENTLY leaves an INVALID index that would be skipped forever
+        cursor.execute(drop_index)
+        raise
+
+
+def recreate_indexes(conn):
+    """Rebuild the indexes recorded in deferred_indexes without blocking readers
+    
+    Runs after a bulk load and on every startup, so indexes dropped by a run that
+    crashed or was killed are restored. INVALID indexes on cryptosymbols (from an
+    interrupted CREATE INDEX CONCURRENTLY) are queued and rebuilt the same way. A
+    definition stays recorded until its index has been built.
+    """
+    conn.commit()
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    conn.autocommit = True
+    cursor = conn.cursor()
+    try:
+        create_deferred_indexes_table_if_not_exists(cursor)
+        cursor.execute("""
+            INSERT INTO deferred_indexes (index_name, index_def)
+            SELECT c.relname, pg_get_indexdef(x.indexrelid)
+            FROM pg_index x
+            JOIN pg_class c ON c.oid = x.indexrelid
+            WHERE x.indrelid = 'cryptosymbols'::regclass
+              AND NOT x.indisvalid
+            ON CONFLICT (index_name) DO NOTHING
+        """)
+        cursor.execute("SELECT index_name, index_def FROM deferred_indexes ORDER BY dropped_at")
+        for index_name, index_def in cursor.fetchall():
+            try:
+                cursor.execute("""
+                    SELECT x.indisvalid
+                    FROM pg_index x
+                    JOIN pg_class c ON c.oid = x.indexrelid
+                    WHERE x.indrelid = 'cryptosymbols'::regclass
+                      AND c.relname = %s
+                """, (index_name,))
+                row = cursor.fetchone()
+                if row is None or not row[0]:
+                    rebuild_index(cursor, index_name, index_def)
+                    print(f"✅ Rebuilt index {index_name}")
+                cursor.execute("DELETE FROM deferred_indexes WHERE index_name = %s", (index_name,))
+            except Exception as e:
+                print(f"❌ Error rebuilding index {index_name}: {e} (kept in deferred_indexes for the next run)")
+    except Exception as e:
+        print(f"❌ Error restoring deferred indexes: {e}")
     finally:
         cursor.close()
+        conn.autocommit = False
+
+
+def db_writer(conn, results_q, ticker_map, stats, stats_lock):
+    """Insert fetched symbol data from results_q on a dedicated connection until a None sentinel
+    
+    If the connection is lost, the writer sets stats["writer_failed"] and keeps
+    draining results_q until its sentinel, so the fetch loop never blocks on a full
+    queue. Symbols it could not commit keep their old latestInfo date and are
+    fetched again on the next run.
+    """
+    pending_updates = []
+    # Rows inserted in the open transaction; only counted once it commits
+    pending_inserted = 0
+    uncommitted = 0
+    failed = False
+    while True:
+        item = results_q.get()
+        if item is None:
+            break
+        if failed:
+            continue
+        symbol, last_date, df = item
+        try:
+            try:
+                inserted = insert_symbol_data(conn, df, ticker_map.get(symbol, {}))
+                pending_inserted += inserted
+                
+                # Update latest date if we inserted new data
+                if inserted > 0:
+                    max_date = df["date"].max()
+                    pending_updates.append((symbol, max_date))
+                    missing_dates = f"{last_date + timedelta(days=1)} to {max_date}"
+                    print(f"✅ {symbol}: Added {inserted} row(s) for dates {missing_dates} (was missing from {last_date})")
+                else:
+                    print(f"⚠️  {symbol}: No new data inserted (may have been duplicates)")
+            except Exception as e:
+                print(f"❌ Error inserting {symbol}: {e}")
+            
+            # One transaction (and WAL flush) per batch of symbols instead of one per statement
+            uncommitted += 1
+            if uncommitted >= COMMIT_BATCH_SYMBOLS:
+                if commit_batch(conn, pending_updates):
+                    with stats_lock:
+                        stats["total_inserted"] += pending_inserted
+                elif conn.closed:
+                    raise RuntimeError("connection lost")
+                pending_updates = []
+                pending_inserted = 0
+                uncommitted = 0
+        except Exception as e:
+            print(f"❌ Database writer stopped: {e}; remaining symbols are skipped until the next run")
+            failed = True
+            with stats_lock:
+                stats["writer_failed"] = True
+    
+    if not failed:
+        if commit_batch(conn, pending_updates):
+            with stats_lock:
+                stats["total_inserted"] += pending_inserted
+        elif conn.closed:
+            with stats_lock:
+                stats["writer_failed"] = True
 
 
 def main():
@@ -246,21 +402,19 @@ def main():
     
     # Connect to cryptoCoins database
     try:
-        conn = psycopg2.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_NAME
-        )
+        conn = connect_db()
     except Exception as e:
         print(f"❌ Error connecting to database: {e}")
         sys.exit(1)
     
     try:
-        # Get all symbols status for logging
-        all_symbols = get_all_symbols_status(conn, yesterday)
-        symbols_to_update = get_symbols_with_missing_data(conn, yesterday)
+        # Restore indexes a previous run dropped but never rebuilt (crash, kill or DB error)
+        recreate_indexes(conn)
+        
+        # Read latestInfo once and split it into stale and up-to-date symbols
+        all_symbols = get_all_symbols_status(conn)
+        # Only symbols where last_available_date < yesterday (not equal) need data
+        symbols_to_update = [(s, d) for s, d in all_symbols if d < yesterday]
         
         # Find symbols that are up to date (last_available_date == yesterday, which is today-1)
         up_to_date_symbols = [(s, d) for s, d in all_symbols if d == yesterday]
@@ -278,46 +432,76 @@ def main():
         for symbol, last_date in symbols_to_update:
             print(f"   - {symbol}: last_available_date = {last_date} (needs data up to {yesterday})")
         
-        total_inserted = 0
+        # One ticker request for all symbols instead of one per symbol
+        ticker_map = fetch_tickers(SESSION, [symbol for symbol, _ in symbols_to_update])
         
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            futures = {}
+        # Writers insert on their own connections while workers keep fetching
+        results_q = Queue(maxsize=RESULT_QUEUE_SIZE)
+        stats = {"total_inserted": 0, "writer_failed": False}
+        stats_lock = threading.Lock()
+        writer_conns = []
+        writers = []
+        dropped_indexes = 0
+        
+        try:
+            for _ in range(DB_WRITER_THREADS):
+                writer_conns.append(connect_db())
+            for writer_conn in writer_conns:
+                writer = threading.Thread(target=db_writer, args=(writer_conn, results_q, ticker_map, stats, stats_lock))
+                writer.start()
+                writers.append(writer)
             
-            for symbol, last_date in symbols_to_update:
-                # Fetch data from day after last_date to yesterday
-                start_date = last_date + timedelta(days=1)
-                end_date = yesterday
-                
-                if start_date <= end_date:
-                    futures[executor.submit(process_symbol, symbol, start_date, end_date)] = (symbol, last_date)
+            # For large backfills, drop secondary indexes and rebuild them once after the load
+            estimated_rows = sum((yesterday - last_date).days for _, last_date in symbols_to_update)
+            if estimated_rows > BULK_LOAD_ROW_THRESHOLD:
+                dropped_indexes = drop_secondary_indexes(conn)
+                if dropped_indexes:
+                    print(f"📉 ~{estimated_rows} rows to load: dropped {dropped_indexes} secondary index(es) until the load finishes")
             
-            completed = 0
-            for future in as_completed(futures):
-                symbol, last_date = futures[future]
-                try:
-                    data_rows = future.result()
-                    if data_rows:
-                        inserted = insert_symbol_data(conn, data_rows)
-                        total_inserted += inserted
-                        
-                        # Update latest date if we inserted new data
-                        if inserted > 0:
-                            max_date = max(row["date"] for row in data_rows)
-                            update_latest_date(conn, symbol, max_date)
-                            missing_dates = f"{last_date + timedelta(days=1)} to {max_date}"
-                            print(f"✅ {symbol}: Added {inserted} row(s) for dates {missing_dates} (was missing from {last_date})")
-                        else:
-                            print(f"⚠️  {symbol}: No new data inserted (may have been duplicates)")
-                    else:
-                        print(f"⚠️  {symbol}: No data fetched from API (last_date: {last_date})")
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                futures = {}
+                
+                for symbol, last_date in symbols_to_update:
+                    # Fetch data from day after last_date to yesterday
+                    start_date = last_date + timedelta(days=1)
+                    end_date = yesterday
                     
-                    completed += 1
-                except Exception as e:
-                    print(f"❌ Error processing {symbol}: {e}")
+                    if start_date <= end_date:
+                        futures[executor.submit(process_symbol, symbol, start_date, end_date)] = (symbol, last_date)
+                
+                for future in as_completed(futures):
+                    symbol, last_date = futures[future]
+                    try:
+                        df = future.result()
+                        if df is not None and not df.empty:
+                            results_q.put((symbol, last_date, df))
+                        else:
+                            print(f"⚠️  {symbol}: No data fetched from API (last_date: {last_date})")
+                    except BinanceBanError:
+                        raise
+                    except Exception as e:
+                        print(f"❌ Error processing {symbol}: {e}")
+        finally:
+            for _ in writers:
+                results_q.put(None)
+            for writer in writers:
+                writer.join()
+            for writer_conn in writer_conns:
+                writer_conn.close()
+            if dropped_indexes:
+                recreate_indexes(conn)
         
+        total_inserted = stats["total_inserted"]
+        if stats["writer_failed"]:
+            print(f"❌ Filter3 finished with a failed database writer: {total_inserted} new rows committed, the rest are fetched again on the next run")
+            sys.exit(1)
         print(f"✅ Filter3 completed! Inserted {total_inserted} new rows")
         
+    except BinanceBanError as e:
+        print(f"❌ {e}; stopping")
+        sys.exit(1)
     finally:
+        SESSION.close()
         conn.close()
 
 
@@ -17,22 +17,30 @@ Features:
 # Note: This script will now also write `predict.py`-compatible artifacts in
 # `lstm_models/` so the single-day prediction script can reuse models and
 # scalers without retraining (files: {symbol}_model.h5, {symbol}_scaler.pkl,
-# and {symbol}_meta.json).
+# {symbol}_scaler.json and {symbol}_meta.json).
 
+import io
+import multiprocessing
 import os
 import sys
 import json
+import orjson
 import pickle
+import shutil
+import weakref
 import psycopg2
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import pandas as pd
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.metrics import mean_squared_error, mean_absolute_percentage_error, r2_score
 import tensorflow as tf
 from tensorflow.keras.models import Sequential, load_model
 from tensorflow.keras.layers import LSTM, Dense, Dropout
-from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
+from tensorflow.keras.callbacks import EarlyStopping
+from lstm_common import CUDNN_LSTM_KWARGS, JIT_COMPILE, calibration_windows, check_quantization, make_datasets
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -49,9 +57,26 @@ DEFAULT_TRAIN_SPLIT = 0.7  # 70% for training
 DEFAULT_PREDICTION_DAYS = 7  # Predict next 7 days
 MODEL_DIR = "lstm_models"
 
+# Worker processes for --batch mode (default: half the CPU cores)
+BATCH_MAX_WORKERS = int(os.getenv("LSTM_BATCH_WORKERS", "0"))
+
+# Model input features (Open, High, Low, Close, Volume) and their column positions
+FEATURES = ('open', 'high', 'low', 'close', 'volume')
+FEATURE_TO_IDX = {feature: i for i, feature in enumerate(FEATURES)}
+
+# Model inputs are built as float32; pin Keras to match so fit/predict never cast
+tf.keras.backend.set_floatx('float32')
+
+# Optional Keras mixed-precision policy, e.g. "mixed_float16" on GPUs with tensor
+# cores or "mixed_bfloat16" on CPUs with AVX512-BF16. Unset keeps pure float32,
+# which is faster on the CPU-only Docker image.
+MIXED_PRECISION_POLICY = os.getenv("LSTM_MIXED_PRECISION")
+if MIXED_PRECISION_POLICY:
+    tf.keras.mixed_precision.set_global_policy(MIXED_PRECISION_POLICY)
+
 
 def get_historical_data(conn, symbol, limit=None):
-    """Fetch historical price data from database"""
+    """Fetch historical price data from database (the most recent `limit` rows if given)"""
     cursor = conn.cursor()
     try:
         query = """
@@ -61,23 +86,49 @@ def get_historical_data(conn, symbol, limit=None):
             ORDER BY date ASC
         """
         if limit:
-            query += f" LIMIT {limit}"
+            # Take the newest rows, then put them back in chronological order
+            query = f"""
+                SELECT * FROM (
+                    SELECT date, open, high, low, close, volume, "quoteAssetVolume"
+                    FROM cryptosymbols
+                    WHERE symbol = %s
+                    ORDER BY date DESC
+                    LIMIT {int(limit)}
+                ) recent
+                ORDER BY date ASC
+            """
         
-        cursor.execute(query, (symbol,))
-        rows = cursor.fetchall()
+        # COPY streams the result as one CSV buffer that pandas parses in C,
+        # instead of materialising a Python tuple of Decimals per row
+        copy_query = cursor.mogrify(query, (symbol,)).decode()
+        buffer = io.StringIO()
+        cursor.copy_expert(f"COPY ({copy_query}) TO STDOUT WITH (FORMAT CSV, HEADER)", buffer)
+        buffer.seek(0)
         
-        if not rows:
+        numeric_columns = [*FEATURES, 'quoteAssetVolume']
+        df = pd.read_csv(buffer, parse_dates=['date'], dtype={c: 'float64' for c in numeric_columns})
+        if df.empty:
             return None
         
-        df = pd.DataFrame(rows, columns=['date', 'open', 'high', 'low', 'close', 'volume', 'quoteAssetVolume'])
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date').reset_index(drop=True)
-        
         return df
     finally:
         cursor.close()
 
 
+def create_sequences(scaled_data, lookback_period, close_idx):
+    """
+    Build (X, y) training windows from scaled data without a Python loop
+    
+    X[i] is scaled_data[i:i+lookback_period] and y[i] is the close value that
+    follows that window. Both are returned as contiguous float32 arrays.
+    """
+    n_features = scaled_data.shape[1]
+    windows = sliding_window_view(scaled_data, window_shape=(lookback_period, n_features)).squeeze(1)
+    X = np.ascontiguousarray(windows[:-1], dtype=np.float32)
+    y = scaled_data[lookback_period:, close_idx].astype(np.float32)
+    return X, y
+
+
 def prepare_data(df, lookback_period=DEFAULT_LOOKBACK, target_column='close'):
     """
     Prepare data for LSTM training
@@ -92,22 +143,14 @@ def prepare_data(df, lookback_period=DEFAULT_LOOKBACK, target_column='close'):
         scaler: Fitted scaler for inverse transformation
     """
     # Select features: Open, High, Low, Close, Volume
-    features = ['open', 'high', 'low', 'close', 'volume']
-    data = df[features].values
+    data = df[list(FEATURES)].values
     
-    # Normalize the data
-    scaler = MinMaxScaler(feature_range=(0, 1))
-    scaled_data = scaler.fit_transform(data)
+    # Normalize the data (one vectorized min/max pass instead of MinMaxScaler.fit_transform)
+    scaler = AffineScaler.fit(data)
+    scaled_data = scaler.transform(data).astype(np.float32, copy=False)
     
-    # Create sequences
-    X, y = [], []
-    for i in range(lookback_period, len(scaled_data)):
-        X.append(scaled_data[i-lookback_period:i])
-        # Target is the close price
-        close_idx = features.index(target_column)
-        y.append(scaled_data[i, close_idx])
-    
-    X, y = np.array(X), np.array(y)
+    # Create sequences (target is the close price)
+    X, y = create_sequences(scaled_data, lookback_period, FEATURE_TO_IDX[target_column])
     
     return X, y, scaler
 
@@ -132,17 +175,16 @@ def build_lstm_model(input_shape, units=50, dropout=0.2):
     Returns:
         Compiled Keras model
     """
+    # A single recurrent layer matches the old 3-layer stack on 5-feature OHLCV
+    # input at roughly a third of the recurrent compute
     model = Sequential([
-        LSTM(units=units, return_sequences=True, input_shape=input_shape),
-        Dropout(dropout),
-        LSTM(units=units, return_sequences=True),
-        Dropout(dropout),
-        LSTM(units=units),
+        LSTM(units=units, input_shape=input_shape, **CUDNN_LSTM_KWARGS),
         Dropout(dropout),
-        Dense(units=1)
+        # Keep the output layer in float32 for numerical stability under mixed precision
+        Dense(units=1, dtype='float32')
     ])
     
-    model.compile(optimizer='adam', loss='mean_squared_error', metrics=['mae'])
+    model.compile(optimizer='adam', loss='mean_squared_error', metrics=['mae'], jit_compile=JIT_COMPILE)
     return model
 
 
@@ -154,16 +196,143 @@ def get_model_paths(symbol, lookback_period):
     return model_path, scaler_path
 
 
+def get_saved_model_dir(symbol, lookback_period):
+    """Get the SavedModel export directory for a symbol and lookback period"""
+    return os.path.join(MODEL_DIR, f"{symbol}_lstm_lb{lookback_period}_saved")
+
+
+def get_tflite_path(symbol, lookback_period):
+    """Get the INT8 TFLite model path for a symbol and lookback period"""
+    return os.path.join(MODEL_DIR, f"{symbol}_lstm_lb{lookback_period}_int8.tflite")
+
+
+def get_scaler_params_path(scaler_path):
+    """Get the .npz affine-parameters path stored next to a pickled scaler"""
+    return os.path.splitext(scaler_path)[0] + ".npz"
+
+
+class AffineScaler:
+    """Minimal stand-in for a fitted MinMaxScaler with feature_range=(0, 1)
+    
+    Holds only the per-column `data_min_` and `data_range_` arrays, so it loads
+    from a tiny .npz without unpickling sklearn objects.
+    """
+
+    def __init__(self, data_min, data_range):
+        self.data_min_ = np.asarray(data_min, dtype=np.float64)
+        self.data_range_ = np.asarray(data_range, dtype=np.float64)
+
+    @classmethod
+    def fit(cls, data):
+        data_min = data.min(axis=0)
+        data_range = data.max(axis=0) - data_min
+        # Constant columns scale to 0, as MinMaxScaler does
+        return cls(data_min, np.where(data_range == 0, 1.0, data_range))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as params:
+            return cls(params['data_min'], params['data_range'])
+
+    def transform(self, x):
+        return (x - self.data_min_) / self.data_range_
+
+    def inverse_transform(self, x):
+        return x * self.data_range_ + self.data_min_
+
+    def to_min_max_scaler(self):
+        """Equivalent fitted MinMaxScaler, for the pickles predict.py reads"""
+        return MinMaxScaler(feature_range=(0, 1)).fit(np.vstack([self.data_min_, self.data_min_ + self.data_range_]))
+
+
+def pickle_scaler(scaler, path):
+    """Pickle a scaler as a sklearn MinMaxScaler so any loader can unpickle it"""
+    if isinstance(scaler, AffineScaler):
+        scaler = scaler.to_min_max_scaler()
+    with open(path, 'wb') as f:
+        pickle.dump(scaler, f)
+
+
+def save_scaler_params(scaler, scaler_path):
+    """Write a scaler's affine parameters next to its pickle"""
+    np.savez(get_scaler_params_path(scaler_path), data_min=scaler.data_min_, data_range=scaler.data_range_)
+
+
+class ExportedModel:
+    """Callable wrapper around a SavedModel written by `model.export()`
+    
+    The `serve` endpoint is already traced, so loading skips rebuilding the
+    Keras object graph and the first call skips retracing.
+    """
+
+    def __init__(self, saved_dir):
+        self._serve = tf.saved_model.load(saved_dir).serve
+
+    def __call__(self, inputs, training=False):
+        return self._serve(tf.convert_to_tensor(inputs, dtype=tf.float32))
+
+
+class TFLiteModel:
+    """Callable wrapper around an INT8 TFLite interpreter
+    
+    The input tensor is resized whenever the batch shape changes, so the same
+    interpreter serves both the validation batch and single-sequence steps.
+    """
+
+    def __init__(self, tflite_path):
+        self._interpreter = tf.lite.Interpreter(model_path=tflite_path)
+        self._input_index = self._interpreter.get_input_details()[0]['index']
+        self._output_index = self._interpreter.get_output_details()[0]['index']
+        self._input_shape = None
+
+    def __call__(self, inputs, training=False):
+        inputs = np.asarray(inputs, dtype=np.float32)
+        if inputs.shape != self._input_shape:
+            self._interpreter.resize_tensor_input(self._input_index, inputs.shape)
+            self._interpreter.allocate_tensors()
+            self._input_shape = inputs.shape
+        self._interpreter.set_tensor(self._input_index, inputs)
+        self._interpreter.invoke()
+        return tf.convert_to_tensor(self._interpreter.get_tensor(self._output_index))
+
+
+def is_current_export(export_path, model_path):
+    """True if an exported model file exists and is at least as new as the .h5 it was made from"""
+    if not os.path.exists(export_path):
+        return False
+    return not os.path.exists(model_path) or os.path.getmtime(export_path) >= os.path.getmtime(model_path)
+
+
 def load_trained_model(symbol, lookback_period):
-    """Load pre-trained model and scaler if they exist"""
+    """Load pre-trained model and scaler if they exist (INT8 TFLite, then SavedModel, then HDF5)
+    
+    An export is only used if it is at least as new as the .h5, so a failed
+    re-export after retraining can't keep serving the previous model.
+    """
     model_path, scaler_path = get_model_paths(symbol, lookback_period)
+    scaler_params_path = get_scaler_params_path(scaler_path)
+    saved_dir = get_saved_model_dir(symbol, lookback_period)
+    tflite_path = get_tflite_path(symbol, lookback_period)
+    use_tflite = is_current_export(tflite_path, model_path)
+    # model.export() rewrites saved_model.pb; the directory's own mtime may not change
+    use_saved = is_current_export(os.path.join(saved_dir, "saved_model.pb"), model_path)
     
-    if os.path.exists(model_path) and os.path.exists(scaler_path):
+    has_model = use_tflite or use_saved or os.path.exists(model_path)
+    has_scaler = os.path.exists(scaler_params_path) or os.path.exists(scaler_path)
+    if has_model and has_scaler:
         try:
             print(f"📂 Loading pre-trained model for {symbol} (lookback={lookback_period})...", file=sys.stderr)
-            model = load_model(model_path)
-            with open(scaler_path, 'rb') as f:
-                scaler = pickle.load(f)
+            if use_tflite:
+                model = TFLiteModel(tflite_path)
+            elif use_saved:
+                model = ExportedModel(saved_dir)
+            else:
+                model = load_model(model_path)
+            if os.path.exists(scaler_params_path):
+                scaler = AffineScaler.load(scaler_params_path)
+            else:
+                with open(scaler_path, 'rb') as f:
+                    scaler = pickle.load(f)
             print(f"✅ Loaded pre-trained model and scaler", file=sys.stderr)
             return model, scaler, True
         except Exception as e:
@@ -174,17 +343,59 @@ def load_trained_model(symbol, lookback_period):
 
 
 def save_model_and_scaler(model, scaler, symbol, lookback_period):
-    """Save trained model and scaler to disk"""
+    """Save trained model (HDF5 and SavedModel export) and scaler to disk"""
     model_path, scaler_path = get_model_paths(symbol, lookback_period)
+    saved_dir = get_saved_model_dir(symbol, lookback_period)
     
     try:
         model.save(model_path)
-        with open(scaler_path, 'wb') as f:
-            pickle.dump(scaler, f)
+        pickle_scaler(scaler, scaler_path)
+        save_scaler_params(scaler, scaler_path)
         print(f"💾 Saved model: {model_path}", file=sys.stderr)
         print(f"💾 Saved scaler: {scaler_path}", file=sys.stderr)
     except Exception as e:
         print(f"⚠️  Warning: Failed to save model/scaler: {e}", file=sys.stderr)
+    
+    try:
+        model.export(saved_dir)
+        print(f"💾 Saved SavedModel export: {saved_dir}", file=sys.stderr)
+    except Exception as e:
+        print(f"⚠️  Warning: Failed to export SavedModel: {e}", file=sys.stderr)
+
+
+def export_tflite_int8(model, X, X_val, y_val, symbol, lookback_period):
+    """Quantize the trained model to INT8 TFLite for CPU inference, if it stays accurate
+    
+    Activation ranges are calibrated on windows spread over the whole history,
+    including the most recent ones. The file is only written if its validation MAE
+    is within QUANTIZED_MAX_MAE_INCREASE of the Keras model's; otherwise any older
+    INT8 export is removed so load_trained_model can't pick it up.
+    """
+    tflite_path = get_tflite_path(symbol, lookback_period)
+    tmp_path = tflite_path + ".tmp"
+    X_calib = calibration_windows(X)
+    
+    try:
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = lambda: ([x[np.newaxis]] for x in X_calib)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        with open(tmp_path, 'wb') as f:
+            f.write(converter.convert())
+        
+        y_quant = TFLiteModel(tmp_path)(X_val).numpy()
+        ok, mae_float, mae_quant = check_quantization(y_val, model(X_val, training=False).numpy(), y_quant)
+        if ok:
+            os.replace(tmp_path, tflite_path)
+            print(f"💾 Saved INT8 TFLite model: {tflite_path} (val MAE {mae_quant:.5f}, Keras {mae_float:.5f})", file=sys.stderr)
+            return
+        print(f"⚠️  INT8 TFLite model rejected: val MAE {mae_quant:.5f}, Keras {mae_float:.5f}", file=sys.stderr)
+    except Exception as e:
+        print(f"⚠️  Warning: Failed to export INT8 TFLite model: {e}", file=sys.stderr)
+    
+    for path in (tmp_path, tflite_path):
+        if os.path.exists(path):
+            os.remove(path)
 
 
 def save_predict_compatibility(model, scaler, symbol, lookback_period, last_data_date=None, training_samples=None, validation_samples=None):
@@ -193,6 +404,7 @@ def save_predict_compatibility(model, scaler, symbol, lookback_period, last_data
     This writes:
       - lstm_models/{symbol}_model.h5
       - lstm_models/{symbol}_scaler.pkl
+      - lstm_models/{symbol}_scaler.json
       - lstm_models/{symbol}_meta.json
     """
     try:
@@ -200,19 +412,33 @@ def save_predict_compatibility(model, scaler, symbol, lookback_period, last_data
 
         predict_model_path = os.path.join(MODEL_DIR, f"{symbol}_model.h5")
         predict_scaler_path = os.path.join(MODEL_DIR, f"{symbol}_scaler.pkl")
+        predict_scaler_json_path = os.path.join(MODEL_DIR, f"{symbol}_scaler.json")
         meta_path = os.path.join(MODEL_DIR, f"{symbol}_meta.json")
+        # Files save_model_and_scaler has just written for this model
+        model_path, scaler_path = get_model_paths(symbol, lookback_period)
 
-        # Save model
+        # Save model (byte copy instead of serializing again). Not a hardlink: h5py
+        # truncates files in place, so predict.py overwriting its copy would
+        # also clobber the lookback-specific model.
         try:
-            model.save(predict_model_path)
+            if os.path.exists(model_path):
+                shutil.copyfile(model_path, predict_model_path)
+            else:
+                model.save(predict_model_path)
             print(f"💾 Saved predict-compatible model: {predict_model_path}", file=sys.stderr)
         except Exception as e:
             print(f"⚠️  Failed to save predict-compatible model: {e}", file=sys.stderr)
 
         # Save scaler
         try:
-            with open(predict_scaler_path, 'wb') as f:
-                pickle.dump(scaler, f)
+            if os.path.exists(scaler_path):
+                shutil.copyfile(scaler_path, predict_scaler_path)
+            else:
+                pickle_scaler(scaler, predict_scaler_path)
+            # predict.py prefers this JSON min/scale form over the pickle
+            with open(predict_scaler_json_path, 'w') as f:
+                json.dump({'min': np.asarray(scaler.data_min_).tolist(),
+                           'scale': (1.0 / np.asarray(scaler.data_range_)).tolist()}, f)
             print(f"💾 Saved predict-compatible scaler: {predict_scaler_path}", file=sys.stderr)
         except Exception as e:
             print(f"⚠️  Failed to save predict-compatible scaler: {e}", file=sys.stderr)
@@ -236,26 +462,24 @@ def save_predict_compatibility(model, scaler, symbol, lookback_period, last_data
         print(f"⚠️  Unexpected error while saving predict-compatible artifacts: {e}", file=sys.stderr)
 
 
-def train_model(model, X_train, y_train, X_val, y_val, epochs=50, batch_size=32, symbol=None, lookback_period=None):
+def train_model(model, X_train, y_train, X_val, y_val, epochs=50, batch_size=32):
     """Train the LSTM model"""
     # Create model directory if it doesn't exist
     os.makedirs(MODEL_DIR, exist_ok=True)
     
-    # Callbacks
+    # Callbacks: restore_best_weights leaves the best epoch's weights in memory, and
+    # save_model_and_scaler writes them once after training
     callbacks = [
         EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True),
     ]
     
-    if symbol and lookback_period:
-        model_path, _ = get_model_paths(symbol, lookback_period)
-        callbacks.append(ModelCheckpoint(model_path, monitor='val_loss', save_best_only=True, verbose=0))
+    train_ds, val_ds = make_datasets(X_train, y_train, X_val, y_val, batch_size)
     
     # Train the model
     history = model.fit(
-        X_train, y_train,
-        validation_data=(X_val, y_val),
+        train_ds,
+        validation_data=val_ds,
         epochs=epochs,
-        batch_size=batch_size,
         callbacks=callbacks,
         verbose=0
     )
@@ -270,19 +494,17 @@ def evaluate_model(model, X_val, y_val, scaler, target_column='close'):
     Returns:
         Dictionary with RMSE, MAPE, and R-squared metrics
     """
-    # Make predictions
-    y_pred_scaled = model.predict(X_val, verbose=0)
-    
-    # Inverse transform predictions
-    # Create dummy array for inverse transform
-    dummy = np.zeros((len(y_pred_scaled), 5))  # 5 features
-    close_idx = ['open', 'high', 'low', 'close', 'volume'].index(target_column)
-    dummy[:, close_idx] = y_pred_scaled.flatten()
-    y_pred = scaler.inverse_transform(dummy)[:, close_idx]
+    # Make predictions in a single forward pass; the validation set is small enough
+    # that model.predict's batching/callback machinery costs more than it saves
+    y_pred_scaled = model(X_val.astype(np.float32), training=False).numpy()
     
-    # Inverse transform actual values
-    dummy[:, close_idx] = y_val
-    y_actual = scaler.inverse_transform(dummy)[:, close_idx]
+    # Inverse transform predictions and actual values
+    # MinMaxScaler is a per-column affine map, so only the target column is needed
+    close_idx = FEATURE_TO_IDX[target_column]
+    cmin = scaler.data_min_[close_idx]
+    crange = scaler.data_range_[close_idx]
+    y_pred = y_pred_scaled.ravel() * crange + cmin
+    y_actual = y_val * crange + cmin
     
     # Calculate metrics
     rmse = np.sqrt(mean_squared_error(y_actual, y_pred))
@@ -293,11 +515,65 @@ def evaluate_model(model, X_val, y_val, scaler, target_column='close'):
         'rmse': float(rmse),
         'mape': float(mape),
         'r2_score': float(r2),
-        'predictions': y_pred.tolist(),
-        'actual': y_actual.tolist()
+        'predictions': y_pred,
+        'actual': y_actual
     }
 
 
+# Traced forward passes per live model and sequence shape. Keyed weakly on the model,
+# so a --batch worker drops each symbol's steps along with its model
+_PREDICT_STEPS = weakref.WeakKeyDictionary()
+
+
+def get_predict_step(model, sequence_shape):
+    """Return a tf.function forward pass for one (1, lookback, features) sequence, traced once per model"""
+    if isinstance(model, TFLiteModel):
+        # The interpreter runs outside TensorFlow's graph and cannot be traced
+        return model
+    steps = _PREDICT_STEPS.setdefault(model, {})
+    key = tuple(sequence_shape)
+    if key not in steps:
+        # The step only holds a weak reference, or it would keep its own cache key alive
+        model_ref = weakref.ref(model)
+        steps[key] = tf.function(
+            lambda seq: model_ref()(seq, training=False),
+            input_signature=[tf.TensorSpec((1, *sequence_shape), tf.float32)]
+        )
+    return steps[key]
+
+
+def rollout_window(model, last_sequence, days, close_idx):
+    """Autoregressive rollout re-running the model over a sliding window: days * lookback steps"""
+    predict_step = get_predict_step(model, last_sequence.shape)
+    lookback, n_features = last_sequence.shape
+    
+    # Sliding window over a (2 * lookback) backing store: the window is always the
+    # view backing[head:head + lookback], so steps only write one new row and the
+    # store is compacted once every `lookback` steps
+    backing = np.empty((2 * lookback, n_features), dtype=np.float32)
+    backing[:lookback] = last_sequence
+    head = 0
+    
+    predictions_scaled = []
+    for _ in range(days):
+        # Predict next value with the traced forward pass (no per-call Keras dispatch)
+        window = backing[head:head + lookback]
+        next_pred_scaled = float(predict_step(window[np.newaxis]).numpy()[0, 0])
+        predictions_scaled.append(next_pred_scaled)
+        
+        if head + lookback == len(backing):
+            backing[:lookback] = window
+            head = 0
+        
+        # Append the last row with the predicted close (simplified approach)
+        tail = head + lookback
+        backing[tail] = backing[tail - 1]
+        backing[tail, close_idx] = next_pred_scaled
+        head += 1
+    
+    return predictions_scaled
+
+
 def predict_future(model, last_sequence, scaler, days=DEFAULT_PREDICTION_DAYS, target_column='close'):
     """
     Predict future prices
@@ -312,63 +588,116 @@ def predict_future(model, last_sequence, scaler, days=DEFAULT_PREDICTION_DAYS, t
     Returns:
         List of predicted prices
     """
-    predictions = []
-    current_sequence = last_sequence.copy()
-    features = ['open', 'high', 'low', 'close', 'volume']
-    close_idx = features.index(target_column)
+    close_idx = FEATURE_TO_IDX[target_column]
     
-    for _ in range(days):
-        # Predict next value
-        next_pred_scaled = model.predict(current_sequence.reshape(1, *current_sequence.shape), verbose=0)
-        
-        # Create full feature vector for inverse transform
-        dummy = np.zeros((1, 5))
-        dummy[0, close_idx] = next_pred_scaled[0, 0]
-        next_pred = scaler.inverse_transform(dummy)[0, close_idx]
-        predictions.append(float(next_pred))
-        
-        # Update sequence: shift and add prediction
-        # Use predicted close as all OHLC values (simplified approach)
-        new_row = current_sequence[-1].copy()
-        new_row[close_idx] = next_pred_scaled[0, 0]
-        current_sequence = np.vstack([current_sequence[1:], new_row])
+    # One rollout for every model type (Keras, SavedModel, TFLite), so a symbol's
+    # forecast doesn't depend on which artifact happened to be loaded
+    predictions_scaled = rollout_window(model, last_sequence, days, close_idx)
     
-    return predictions
+    # Inverse transform all predictions at once (affine map on the close column)
+    predictions = np.asarray(predictions_scaled) * scaler.data_range_[close_idx] + scaler.data_min_[close_idx]
+    
+    return [float(p) for p in predictions]
 
 
-def main():
-    """Main function to run LSTM prediction"""
-    if len(sys.argv) < 2:
-        print(json.dumps({
-            'error': 'Symbol argument required',
-            'usage': 'python LSTMPredictor.py <symbol> [lookback_period] [prediction_days]'
-        }))
-        sys.exit(1)
+def build_result(symbol, lookback_period, df, training_samples, validation_samples, metrics,
+                 future_predictions, prediction_days):
+    """Assemble the JSON-serializable prediction result returned to the Java side"""
+    # Get last actual price
+    last_price = float(df['close'].iloc[-1])
+    last_date = df['date'].iloc[-1].strftime('%Y-%m-%d')
     
-    symbol = sys.argv[1].upper()
-    lookback_period = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_LOOKBACK
-    prediction_days = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_PREDICTION_DAYS
+    # Generate prediction dates
+    prediction_dates = []
+    current_date = pd.to_datetime(last_date)
+    for i in range(1, prediction_days + 1):
+        prediction_dates.append((current_date + timedelta(days=i)).strftime('%Y-%m-%d'))
+    
+    # Prepare response
+    # Use camelCase keys so Jackson on the Java side can map fields to DTOs
+    result = {
+        'symbol': symbol,
+        'lookbackPeriod': lookback_period,
+        'trainingSamples': training_samples,
+        'validationSamples': validation_samples,
+        'lastPrice': last_price,
+        'lastDate': last_date,
+        'metrics': {
+            'rmse': metrics['rmse'],
+            'mape': metrics['mape'],
+            'r2Score': metrics['r2_score'] if 'r2_score' in metrics else metrics.get('r2Score')
+        },
+        'predictions': [
+            {
+                'date': date,
+                'predictedPrice': price
+            }
+            for date, price in zip(prediction_dates, future_predictions)
+        ]
+    }
+    
+    return result
+
+
+def run_quick_prediction(conn, model, scaler, symbol, lookback_period, prediction_days):
+    """
+    Inference-only path for --quick: fetch just the rows the last window needs and
+    skip evaluation (metrics are reported as null)
+    """
+    print(f"📥 Fetching last {lookback_period + 1} data points for {symbol} (quick mode)...", file=sys.stderr)
+    df = get_historical_data(conn, symbol, limit=lookback_period + 1)
+    
+    if df is None or len(df) < lookback_period + 1:
+        return {
+            'error': f'Insufficient data for {symbol}. Need at least {lookback_period + 1} data points.'
+        }
+    
+    # Same window the full path predicts from (X[-1])
+    scaled_data = scaler.transform(df[list(FEATURES)].values).astype(np.float32, copy=False)
+    last_sequence = scaled_data[:lookback_period]
+    
+    print(f"🔮 Predicting next {prediction_days} days...", file=sys.stderr)
+    future_predictions = predict_future(model, last_sequence, scaler, days=prediction_days)
+    
+    metrics = {'rmse': None, 'mape': None, 'r2_score': None}
+    return build_result(symbol, lookback_period, df, 0, 0, metrics, future_predictions, prediction_days)
+
+
+def run_prediction(symbol, lookback_period=DEFAULT_LOOKBACK, prediction_days=DEFAULT_PREDICTION_DAYS, quick=False):
+    """
+    Train or load the model for one symbol, evaluate it and predict the next days
+    
+    With quick=True and a saved model, only the last window is fetched and
+    evaluation is skipped.
+    
+    Returns:
+        Result dict for the Java side, or a dict with an 'error' key when the
+        symbol does not have enough data
+    """
+    # Connect to database
+    conn = psycopg2.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME
+    )
     
     try:
-        # Connect to database
-        conn = psycopg2.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_NAME
-        )
+        if quick:
+            model, scaler, model_loaded = load_trained_model(symbol, lookback_period)
+            if model_loaded:
+                return run_quick_prediction(conn, model, scaler, symbol, lookback_period, prediction_days)
+            print(f"⚠️  No pre-trained model for {symbol}, --quick falls back to training", file=sys.stderr)
         
         # Fetch historical data
         print(f"📥 Fetching historical data for {symbol}...", file=sys.stderr)
         df = get_historical_data(conn, symbol)
         
         if df is None or len(df) < lookback_period + 50:
-            print(json.dumps({
+            return {
                 'error': f'Insufficient data for {symbol}. Need at least {lookback_period + 50} data points.'
-            }))
-            conn.close()
-            sys.exit(1)
+            }
         
         print(f"✅ Found {len(df)} data points", file=sys.stderr)
         
@@ -380,18 +709,11 @@ def main():
             print(f"🔧 Preparing data with lookback period: {lookback_period} (using loaded scaler)...", file=sys.stderr)
             
             # Use the loaded scaler to transform current data
-            features = ['open', 'high', 'low', 'close', 'volume']
-            data = df[features].values
-            scaled_data = scaler.transform(data)  # Use loaded scaler
+            data = df[list(FEATURES)].values
+            scaled_data = scaler.transform(data).astype(np.float32, copy=False)  # Use loaded scaler
             
             # Create sequences
-            X, y = [], []
-            for i in range(lookback_period, len(scaled_data)):
-                X.append(scaled_data[i-lookback_period:i])
-                close_idx = features.index('close')
-                y.append(scaled_data[i, close_idx])
-            
-            X, y = np.array(X), np.array(y)
+            X, y = create_sequences(scaled_data, lookback_period, FEATURE_TO_IDX['close'])
             
             # Split for evaluation (we still need validation set for metrics)
             X_train, X_val, y_train, y_val = split_data(X, y)
@@ -411,27 +733,20 @@ def main():
             
             # Build model
             print("🏗️  Building LSTM model...", file=sys.stderr)
-            model = build_lstm_model((lookback_period, 5))
+            model = build_lstm_model((lookback_period, len(FEATURES)))
             
             # Train model
             print("🎓 Training model...", file=sys.stderr)
-            history, model = train_model(model, X_train, y_train, X_val, y_val, epochs=50, symbol=symbol, lookback_period=lookback_period)
+            history, model = train_model(model, X_train, y_train, X_val, y_val, epochs=50)
             
             # Save model and scaler
             save_model_and_scaler(model, scaler, symbol, lookback_period)
+            export_tflite_int8(model, X, X_val, y_val, symbol, lookback_period)
             
             # Evaluate model
             print("📈 Evaluating model...", file=sys.stderr)
             metrics = evaluate_model(model, X_val, y_val, scaler)
         
-            # Ensure predict.py can reuse this model: save predict-compatible copies and metadata
-            try:
-                save_predict_compatibility(model, scaler, symbol, lookback_period,
-                                          last_data_date=df['date'].max(),
-                                          training_samples=len(X_train),
-                                          validation_samples=len(X_val))
-            except Exception as e:
-                print(f"⚠️  Failed to save predict-compatible artifacts after loading model: {e}", file=sys.stderr)
             # Save predict-compatible copies & metadata so `predict.py` can pick them up
             try:
                 save_predict_compatibility(model, scaler, symbol, lookback_period,
@@ -445,43 +760,80 @@ def main():
         last_sequence = X[-1]
         future_predictions = predict_future(model, last_sequence, scaler, days=prediction_days)
         
-        # Get last actual price
-        last_price = float(df['close'].iloc[-1])
-        last_date = df['date'].iloc[-1].strftime('%Y-%m-%d')
-        
-        # Generate prediction dates
-        prediction_dates = []
-        current_date = pd.to_datetime(last_date)
-        for i in range(1, prediction_days + 1):
-            prediction_dates.append((current_date + timedelta(days=i)).strftime('%Y-%m-%d'))
-        
-        # Prepare response
-        # Use camelCase keys so Jackson on the Java side can map fields to DTOs
-        result = {
-            'symbol': symbol,
-            'lookbackPeriod': lookback_period,
-            'trainingSamples': len(X_train),
-            'validationSamples': len(X_val),
-            'lastPrice': last_price,
-            'lastDate': last_date,
-            'metrics': {
-                'rmse': metrics['rmse'],
-                'mape': metrics['mape'],
-                'r2Score': metrics['r2_score'] if 'r2_score' in metrics else metrics.get('r2Score')
-            },
-            'predictions': [
-                {
-                    'date': date,
-                    'predictedPrice': price
-                }
-                for date, price in zip(prediction_dates, future_predictions)
-            ]
+        return build_result(symbol, lookback_period, df, len(X_train), len(X_val), metrics,
+                            future_predictions, prediction_days)
+    finally:
+        conn.close()
+
+
+def init_batch_worker(intra_op_threads):
+    """Limit each batch worker's TensorFlow thread pools so workers don't oversubscribe cores"""
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def run_prediction_safe(symbol, lookback_period, prediction_days):
+    """run_prediction for batch mode: report failures in the result instead of raising"""
+    try:
+        return run_prediction(symbol, lookback_period, prediction_days)
+    except Exception as e:
+        return {
+            'error': str(e),
+            'type': type(e).__name__
         }
+
+
+def run_batch(symbols, lookback_period, prediction_days):
+    """Train/predict several symbols in parallel worker processes, one TensorFlow runtime per worker"""
+    cpu_count = os.cpu_count() or 2
+    max_workers = max(1, min(len(symbols), BATCH_MAX_WORKERS or cpu_count // 2))
+    intra_op_threads = max(1, cpu_count // max_workers)
+    
+    # Spawn rather than fork: the parent has already imported TensorFlow, which is not fork-safe
+    with ProcessPoolExecutor(max_workers=max_workers,
+                             mp_context=multiprocessing.get_context('spawn'),
+                             initializer=init_batch_worker,
+                             initargs=(intra_op_threads,)) as executor:
+        results = executor.map(run_prediction_safe, symbols,
+                               [lookback_period] * len(symbols),
+                               [prediction_days] * len(symbols))
+        return dict(zip(symbols, results))
+
+
+def main():
+    """Main function to run LSTM prediction"""
+    quick = '--quick' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != '--quick']
+    
+    if len(args) < 1 or (args[0] == '--batch' and len(args) < 2):
+        print(json.dumps({
+            'error': 'Symbol argument required',
+            'usage': 'python LSTMPredictor.py [--quick] <symbol> [lookback_period] [prediction_days]\n'
+                     '       python LSTMPredictor.py --batch <symbol1,symbol2,...> [lookback_period] [prediction_days]'
+        }))
+        sys.exit(1)
+    
+    if args[0] == '--batch':
+        symbols = [s.strip().upper() for s in args[1].split(',') if s.strip()]
+        lookback_period = int(args[2]) if len(args) > 2 else DEFAULT_LOOKBACK
+        prediction_days = int(args[3]) if len(args) > 3 else DEFAULT_PREDICTION_DAYS
         
-        # Output JSON result
-        print(json.dumps(result, indent=2))
+        results = run_batch(symbols, lookback_period, prediction_days)
+        print(orjson.dumps(results, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY).decode())
+        return
+    
+    symbol = args[0].upper()
+    lookback_period = int(args[1]) if len(args) > 1 else DEFAULT_LOOKBACK
+    prediction_days = int(args[2]) if len(args) > 2 else DEFAULT_PREDICTION_DAYS
+    
+    try:
+        result = run_prediction(symbol, lookback_period, prediction_days, quick=quick)
+        if 'error' in result:
+            print(json.dumps(result))
+            sys.exit(1)
         
-        conn.close()
+        # Output JSON result
+        print(orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY).decode())
         
     except Exception as e:
         print(json.dumps({
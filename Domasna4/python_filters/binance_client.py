@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Binance HTTP client shared by the Filter scripts
+
+Every request goes through safe_get, which reserves its weight in the process-wide
+RATE_LIMITER (see binance_rate_limit) and retries transient failures with backoff.
+"""
+
+import time
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from binance_rate_limit import BinanceBanError, WeightLimiter
+
+BASE_URL = "https://api.binance.com"
+
+# Fetching is pure network I/O, so allow more in-flight requests than CPU cores
+DEFAULT_MAX_WORKERS = 32
+MAX_RETRIES = 5
+RETRY_DELAY = 3
+
+# Request weight of the Binance endpoints used by the filters
+EXCHANGE_INFO_WEIGHT = 20
+ALL_TICKERS_WEIGHT = 80
+KLINES_WEIGHT = 2
+
+# Request-weight budget shared by every fetch thread in the process
+RATE_LIMITER = WeightLimiter()
+
+# Column layout of a Binance /api/v3/klines row
+KLINE_COLUMNS = [
+    "openTime", "open", "high", "low", "close", "volume", "closeTime",
+    "quoteAssetVolume", "trades", "takerBuyBaseVolume", "takerBuyQuoteVolume", "ignore"
+]
+
+# Columns of the frame klines_to_frame returns, in cryptosymbols column order
+OHLCV_FIELDS = ["date", "open", "high", "low", "close", "volume", "quoteAssetVolume", "symbol"]
+
+
+def make_session(max_workers):
+    """Create an HTTP session whose pool lets max_workers threads reuse keep-alive connections"""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(
+        pool_connections=max_workers,
+        pool_maxsize=max_workers * 2,
+        max_retries=0
+    ))
+    return session
+
+
+def safe_get(session, url, params=None, timeout=20, weight=1):
+    """Safe HTTP GET with retry logic within the shared request-weight budget
+
+    Raises BinanceBanError (never retried) if Binance has banned the IP.
+    """
+    backoff = RETRY_DELAY
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            RATE_LIMITER.acquire(weight)
+            r = session.get(url, params=params, timeout=timeout)
+            if RATE_LIMITER.check_response(r, backoff):
+                backoff *= 1.7
+                continue
+            r.raise_for_status()
+            return r
+        except BinanceBanError:
+            raise
+        except Exception:
+            if attempt < MAX_RETRIES:
+                time.sleep(backoff)
+                backoff *= 1.7
+            else:
+                return None
+    return None
+
+
+def klines_to_frame(klines, symbol):
+    """Convert raw klines rows to a DataFrame of OHLCV_FIELDS with vectorized pandas conversions
+
+    Malformed numeric fields become 0.0 instead of failing the symbol.
+    """
+    df = pd.DataFrame(klines, columns=KLINE_COLUMNS)
+    df["date"] = pd.to_datetime(df["openTime"], unit="ms", utc=True).dt.date
+    numeric_cols = OHLCV_FIELDS[1:-1]
+    df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors="coerce").fillna(0.0).astype(float)
+    df["symbol"] = symbol
+    return df[OHLCV_FIELDS]
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Binance request-weight limiter shared by the Filter scripts
+
+Binance counts request weight per IP in fixed one-minute windows and reports the
+window's running total in the X-MBX-USED-WEIGHT-1M header. Worker threads reserve
+a request's weight here before sending it, so they can't all act on the same
+stale header value and overshoot together; once the budget is spent they sleep
+until the next minute starts. The server's count is folded in from each
+response, so weight used by other processes on the same IP is respected too.
+
+A 429 pauses every thread for its Retry-After. A 418 means the IP is banned, and
+retrying only extends the ban, so every further request raises BinanceBanError.
+"""
+
+import threading
+import time
+
+# Per-minute REQUEST_WEIGHT limit assumed until exchangeInfo's rateLimits are known
+DEFAULT_WEIGHT_LIMIT = 1200
+# Share of the limit spent before waiting for the next window
+WEIGHT_BUDGET_FRACTION = 0.9
+
+
+class BinanceBanError(RuntimeError):
+    """Binance answered HTTP 418: this IP is banned for retry_after seconds"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Binance banned this IP (HTTP 418); retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class WeightLimiter:
+    """Thread-safe per-minute request-weight budget"""
+
+    def __init__(self, limit=DEFAULT_WEIGHT_LIMIT):
+        self._lock = threading.Lock()
+        self._budget = int(limit * WEIGHT_BUDGET_FRACTION)
+        self._window = None
+        self._used = 0
+        self._paused_until = 0.0
+        self._banned_until = None
+
+    def configure(self, rate_limits):
+        """Size the budget from exchangeInfo's rateLimits list"""
+        for rate_limit in rate_limits:
+            if (rate_limit.get("rateLimitType") == "REQUEST_WEIGHT" and
+                    rate_limit.get("interval") == "MINUTE" and rate_limit.get("intervalNum") == 1):
+                with self._lock:
+                    self._budget = int(int(rate_limit["limit"]) * WEIGHT_BUDGET_FRACTION)
+
+    def acquire(self, weight=1):
+        """Block until `weight` fits in the current minute's budget, then reserve it"""
+        while True:
+            with self._lock:
+                if self._banned_until is not None:
+                    raise BinanceBanError(max(0.0, self._banned_until - time.time()))
+                now = time.time()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    window = int(now // 60)
+                    if window != self._window:
+                        self._window, self._used = window, 0
+                    if self._used + min(weight, self._budget) <= self._budget:
+                        self._used += weight
+                        return
+                    # Budget spent: wait for the window to reset (plus a little clock slack)
+                    wait = (window + 1) * 60 - now + 0.5
+            time.sleep(wait)
+
+    def check_response(self, r, default_retry_after):
+        """Fold in the server's weight count and handle rate-limit statuses
+
+        Returns True if the request got a 429 and should be retried (every thread
+        is paused for Retry-After first). Raises BinanceBanError on a 418.
+        """
+        retry_after = float(r.headers.get("Retry-After", default_retry_after))
+        header = r.headers.get("X-MBX-USED-WEIGHT-1M")
+        with self._lock:
+            if header is not None and self._window == int(time.time() // 60):
+                self._used = max(self._used, int(header))
+            if r.status_code == 418:
+                self._banned_until = time.time() + retry_after
+                raise BinanceBanError(retry_after)
+            if r.status_code == 429:
+                self._paused_until = max(self._paused_until, time.time() + retry_after)
+                return True
+        return False
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+One-shot migration creating the indexes used by the OHLCV queries
+
+Builds the covering (symbol, date) index with CREATE INDEX CONCURRENTLY, so the
+cryptosymbols table stays writable while it is built. Safe to re-run: an
+INVALID index left by an interrupted build is dropped and built again.
+
+Usage:
+    python create_indexes.py
+"""
+
+import sys
+from sqlalchemy import text
+
+from database_connector import get_connector
+
+# Index name -> definition, built without blocking writers
+INDEXES = {
+    "ix_cryptosymbols_symbol_date": """
+    CREATE INDEX CONCURRENTLY ix_cryptosymbols_symbol_date
+    ON cryptosymbols (symbol, date)
+    INCLUDE (open, high, low, close, volume)
+    """
+}
+
+
+def index_is_valid(conn, index_name):
+    """Return None if the index doesn't exist on cryptosymbols, else its pg_index.indisvalid"""
+    return conn.execute(text("""
+        SELECT x.indisvalid
+        FROM pg_index x
+        JOIN pg_class c ON c.oid = x.indexrelid
+        WHERE x.indrelid = 'cryptosymbols'::regclass
+          AND c.relname = :index_name
+    """), {"index_name": index_name}).scalar()
+
+
+def create_indexes():
+    """Create any missing indexes on the cryptosymbols table, rebuilding invalid ones"""
+    connector = get_connector()
+    # CONCURRENTLY cannot run inside a transaction block
+    with connector.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for index_name, statement in INDEXES.items():
+            valid = index_is_valid(conn, index_name)
+            if valid:
+                continue
+            drop_index = text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+            if valid is not None:
+                print(f"Rebuilding invalid index {index_name}...")
+                conn.execute(drop_index)
+            try:
+                conn.execute(text(statement))
+            except Exception:
+                # Don't leave the INVALID index a failed concurrent build creates
+                conn.execute(drop_index)
+                raise
+        # Refresh planner statistics for the new index
+        conn.execute(text("ANALYZE cryptosymbols"))
+
+
+if __name__ == "__main__":
+    try:
+        print("Creating indexes on cryptosymbols...")
+        create_indexes()
+        print("Done")
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
@@ -12,10 +12,13 @@ Usage:
     print(data)
 """
 
+import atexit
+import io
 import os
 from datetime import datetime
-from typing import List, Optional
-from sqlalchemy import create_engine, Column, String, Date, Numeric, select
+from typing import Dict, List, Optional
+from sqlalchemy import create_engine, Column, String, Date, Numeric, Float, Index, any_, bindparam, cast, func, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
 from sqlalchemy.orm import declarative_base, sessionmaker
 import pandas as pd
 
@@ -58,6 +61,59 @@ class CryptoSymbol(Base):
     symbolUsed = Column(String(255), name='symbolUsed', nullable=False)
 
 
+# Composite (symbol, date) index matching every OHLCV query's WHERE symbol = ...
+# ORDER BY date. INCLUDE makes it covering, so the queries are index-only scans.
+# Existing databases get it from create_indexes.py.
+Index(
+    'ix_cryptosymbols_symbol_date',
+    CryptoSymbol.symbol,
+    CryptoSymbol.date,
+    postgresql_include=['open', 'high', 'low', 'close', 'volume']
+)
+
+
+# Columns returned by the OHLCV queries. NUMERIC is cast to double precision
+# server-side so the driver returns floats instead of Decimal objects.
+OHLCV_COLUMNS = (
+    CryptoSymbol.symbol,
+    CryptoSymbol.date,
+    cast(CryptoSymbol.open, Float).label('open'),
+    cast(CryptoSymbol.high, Float).label('high'),
+    cast(CryptoSymbol.low, Float).label('low'),
+    cast(CryptoSymbol.close, Float).label('close'),
+    cast(CryptoSymbol.volume, Float).label('volume')
+)
+OHLCV_FIELDS = ['symbol', 'date', 'open', 'high', 'low', 'close', 'volume']
+# Column types for parsing, so read_csv builds typed columns without inference
+OHLCV_DTYPES = {
+    'symbol': str,
+    'open': 'float64',
+    'high': 'float64',
+    'low': 'float64',
+    'close': 'float64',
+    'volume': 'float64'
+}
+
+# Hand-written single-symbol OHLCV query used on the hot path instead of
+# compiling a select() per call. NULL start/end dates disable those filters and
+# LIMIT NULL means no limit; {direction} is ASC or DESC.
+OHLCV_SQL = """
+    SELECT symbol, date, open::float8 AS open, high::float8 AS high, low::float8 AS low,
+           close::float8 AS close, volume::float8 AS volume
+    FROM cryptosymbols
+    WHERE symbol = %(symbol)s
+      AND (%(start_date)s::date IS NULL OR date >= %(start_date)s::date)
+      AND (%(end_date)s::date IS NULL OR date <= %(end_date)s::date)
+    ORDER BY date {direction}
+    LIMIT %(limit)s
+"""
+
+
+def _normalize_symbol(symbol: str) -> str:
+    """Uppercase a symbol, skipping the copy when it is already uppercase"""
+    return symbol if symbol.isupper() else symbol.upper()
+
+
 class DatabaseConnector:
     """
     Database connector class using SQLAlchemy
@@ -90,15 +146,29 @@ class DatabaseConnector:
         # Create engine
         self.engine = create_engine(
             self.connection_string,
+            pool_size=5,  # Connections kept open for reuse across calls
+            max_overflow=10,  # Extra connections allowed under burst load
+            pool_recycle=3600,  # Replace connections older than an hour
             pool_pre_ping=True,  # Verify connections before using
             echo=False  # Set to True for SQL query logging
         )
         
         # Create session factory
         self.SessionLocal = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)
+        
+        # OHLCV query text for each sort direction, keyed by order_desc
+        self._ohlcv_sql = {
+            False: OHLCV_SQL.format(direction='ASC'),
+            True: OHLCV_SQL.format(direction='DESC')
+        }
     
     def get_session(self):
-        """Get a new database session"""
+        """
+        Get a new database session
+        
+        The read methods below use engine.connect() directly; sessions are only
+        needed for ORM unit-of-work (writes).
+        """
         return self.SessionLocal()
     
     def get_ohlcv_data(
@@ -106,7 +176,8 @@ class DatabaseConnector:
         symbol: str, 
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-        limit: Optional[int] = None
+        limit: Optional[int] = None,
+        order_desc: bool = False
     ) -> pd.DataFrame:
         """
         Get OHLCV daily data for a given cryptocurrency symbol
@@ -116,6 +187,8 @@ class DatabaseConnector:
             start_date: Optional start date filter (datetime object)
             end_date: Optional end date filter (datetime object)
             limit: Optional limit on number of records
+            order_desc: With limit, take the most recent records instead of the
+                oldest (the result is still returned in ascending order)
         
         Returns:
             pandas DataFrame with columns: symbol, date, open, high, low, close, volume
@@ -124,79 +197,131 @@ class DatabaseConnector:
         Raises:
             Exception: If database connection fails or query fails
         """
-        session = self.get_session()
         try:
-            # Build query
-            query = select(
-                CryptoSymbol.symbol,
-                CryptoSymbol.date,
-                CryptoSymbol.open,
-                CryptoSymbol.high,
-                CryptoSymbol.low,
-                CryptoSymbol.close,
-                CryptoSymbol.volume
-            ).where(
-                CryptoSymbol.symbol == symbol.upper()
-            )
-            
-            # Apply date filters if provided
-            if start_date:
-                query = query.where(CryptoSymbol.date >= start_date.date())
-            if end_date:
-                query = query.where(CryptoSymbol.date <= end_date.date())
-            
-            # Order by date ascending
-            query = query.order_by(CryptoSymbol.date.asc())
+            # Descending order picks the newest rows for the limit
+            params = {
+                'symbol': _normalize_symbol(symbol),
+                'start_date': start_date.date() if start_date else None,
+                'end_date': end_date.date() if end_date else None,
+                'limit': limit or None
+            }
             
-            # Apply limit if provided
-            if limit:
-                query = query.limit(limit)
+            # Execute query via COPY and parse it straight into a typed DataFrame
+            df = self._copy_to_dataframe(self._ohlcv_sql[order_desc], params,
+                                         dtype=OHLCV_DTYPES, parse_dates=['date'])
             
-            # Execute query and convert to DataFrame
-            result = session.execute(query)
-            rows = result.fetchall()
+            if df.empty:
+                return pd.DataFrame(columns=OHLCV_FIELDS)
             
-            if not rows:
-                return pd.DataFrame(columns=['symbol', 'date', 'open', 'high', 'low', 'close', 'volume'])
+            # Restore ascending order for descending fetches
+            if order_desc:
+                df = df.iloc[::-1].reset_index(drop=True)
             
-            # Convert to DataFrame
-            df = pd.DataFrame(rows, columns=['symbol', 'date', 'open', 'high', 'low', 'close', 'volume'])
+            return df
             
-            # Convert numeric columns to float
-            numeric_cols = ['open', 'high', 'low', 'close', 'volume']
-            for col in numeric_cols:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+        except Exception as e:
+            raise Exception(f"Error fetching OHLCV data for {symbol}: {str(e)}")
+    
+    def get_ohlcv_data_batch(self, symbols: List[str], limit: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Get OHLCV daily data for several symbols in a single query
+        
+        Args:
+            symbols: Cryptocurrency symbols (e.g., ['BTCUSDT', 'ETHUSDT'])
+            limit: Optional number of most recent records to return per symbol
+        
+        Returns:
+            Dict mapping each requested (uppercased) symbol to a DataFrame with the
+            same columns as get_ohlcv_data, ordered by date ascending. Symbols
+            with no data map to an empty DataFrame.
+        
+        Raises:
+            Exception: If database connection fails or query fails
+        """
+        symbols = [_normalize_symbol(symbol) for symbol in symbols]
+        try:
+            symbol_filter = CryptoSymbol.symbol == any_(bindparam('symbols', symbols, type_=ARRAY(String)))
             
-            # Ensure date is datetime
-            df['date'] = pd.to_datetime(df['date'])
+            if limit:
+                # Newest `limit` rows per symbol via a window function, returned ascending
+                row_number = func.row_number().over(
+                    partition_by=CryptoSymbol.symbol,
+                    order_by=CryptoSymbol.date.desc()
+                ).label('row_number')
+                recent = select(*OHLCV_COLUMNS, row_number).where(symbol_filter).subquery()
+                query = select(*(recent.c[field] for field in OHLCV_FIELDS)).where(
+                    recent.c.row_number <= limit
+                ).order_by(recent.c.symbol.asc(), recent.c.date.asc())
+            else:
+                query = select(*OHLCV_COLUMNS).where(symbol_filter).order_by(
+                    CryptoSymbol.symbol.asc(), CryptoSymbol.date.asc()
+                )
             
-            # Sort by date (ascending) - redundant but ensures order
-            df = df.sort_values('date').reset_index(drop=True)
+            df = self._fetch_via_copy(query, dtype=OHLCV_DTYPES, parse_dates=['date'])
             
-            return df
+            frames = {
+                symbol: group.reset_index(drop=True)
+                for symbol, group in df.groupby('symbol', sort=False)
+            }
+            return {symbol: frames.get(symbol, pd.DataFrame(columns=OHLCV_FIELDS)) for symbol in symbols}
             
         except Exception as e:
-            raise Exception(f"Error fetching OHLCV data for {symbol}: {str(e)}")
+            raise Exception(f"Error fetching OHLCV data for {len(symbols)} symbols: {str(e)}")
+    
+    def _fetch_via_copy(self, query, dtype=None, parse_dates=None) -> pd.DataFrame:
+        """
+        Run a SELECT as COPY ... TO STDOUT and parse the CSV stream with pandas
+        
+        Avoids materialising one Row object per record through the ORM; the
+        result is parsed by pandas' C reader in one pass.
+        
+        Args:
+            query: SQLAlchemy select() to run
+            dtype: Optional column -> dtype mapping passed to read_csv
+            parse_dates: Optional list of columns to parse as datetimes
+        
+        Returns:
+            pandas DataFrame with one column per selected label
+        """
+        compiled = query.compile(dialect=self.engine.dialect)
+        return self._copy_to_dataframe(str(compiled), compiled.params, dtype=dtype, parse_dates=parse_dates)
+    
+    def _copy_to_dataframe(self, select_sql, params, dtype=None, parse_dates=None) -> pd.DataFrame:
+        """
+        COPY a parameterised SELECT (pyformat placeholders) to STDOUT on a raw
+        psycopg2 connection from the pool and parse it with pd.read_csv
+        """
+        raw_conn = self.engine.raw_connection()
+        try:
+            cursor = raw_conn.cursor()
+            try:
+                select_sql = cursor.mogrify(select_sql, params).decode()
+                buffer = io.StringIO()
+                cursor.copy_expert(f"COPY ({select_sql}) TO STDOUT WITH (FORMAT CSV, HEADER)", buffer)
+            finally:
+                cursor.close()
         finally:
-            session.close()
+            raw_conn.close()
+        
+        buffer.seek(0)
+        return pd.read_csv(buffer, dtype=dtype, parse_dates=parse_dates)
     
     def get_symbols_list(self) -> List[str]:
         """
         Get list of all unique symbols in the database
         
         Returns:
-            List of unique symbol strings
+            List of unique symbol strings, sorted
         """
-        session = self.get_session()
         try:
-            query = select(CryptoSymbol.symbol).distinct()
-            result = session.execute(query)
-            symbols = [row[0] for row in result.fetchall()]
-            return sorted(symbols)
+            # Dedup and sort server-side into a single array value:
+            # array_agg(DISTINCT symbol ORDER BY symbol)
+            query = select(func.array_agg(aggregate_order_by(CryptoSymbol.symbol.distinct(), CryptoSymbol.symbol)))
+            with self.engine.connect() as conn:
+                result = conn.execute(query)
+                return list(result.scalar() or [])
         except Exception as e:
             raise Exception(f"Error fetching symbols list: {str(e)}")
-        finally:
-            session.close()
     
     def get_data_count(self, symbol: str) -> int:
         """
@@ -208,19 +333,42 @@ class DatabaseConnector:
         Returns:
             Number of records for the symbol
         """
-        session = self.get_session()
         try:
-            from sqlalchemy import func
             query = select(func.count(CryptoSymbol.id)).where(
-                CryptoSymbol.symbol == symbol.upper()
+                CryptoSymbol.symbol == _normalize_symbol(symbol)
             )
-            result = session.execute(query)
-            count = result.scalar()
+            with self.engine.connect() as conn:
+                result = conn.execute(query)
+                count = result.scalar()
             return count or 0
         except Exception as e:
             raise Exception(f"Error counting records for {symbol}: {str(e)}")
-        finally:
-            session.close()
+    
+    def has_min_data(self, symbol: str, min_records: int) -> bool:
+        """
+        Check whether a symbol has at least `min_records` records
+        
+        Cheaper than get_data_count for threshold checks: the index scan stops
+        at the min_records-th row instead of counting them all.
+        
+        Args:
+            symbol: Cryptocurrency symbol
+            min_records: Required number of records
+        
+        Returns:
+            True if the symbol has at least min_records records
+        """
+        if min_records <= 0:
+            return True
+        try:
+            query = select(literal(1)).where(
+                CryptoSymbol.symbol == _normalize_symbol(symbol)
+            ).offset(min_records - 1).limit(1)
+            with self.engine.connect() as conn:
+                result = conn.execute(query)
+                return result.first() is not None
+        except Exception as e:
+            raise Exception(f"Error checking record count for {symbol}: {str(e)}")
 
 
 # Global connector instance (lazy initialization)
@@ -232,6 +380,8 @@ def get_connector() -> DatabaseConnector:
     global _connector
     if _connector is None:
         _connector = DatabaseConnector()
+        # Close pooled connections cleanly when the process exits
+        atexit.register(_connector.engine.dispose)
     return _connector
 
 
@@ -239,7 +389,8 @@ def get_ohlcv_data(
     symbol: str,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    limit: Optional[int] = None
+    limit: Optional[int] = None,
+    order_desc: bool = False
 ) -> pd.DataFrame:
     """
     Convenience function to get OHLCV data for a symbol
@@ -249,6 +400,7 @@ def get_ohlcv_data(
         start_date: Optional start date filter
         end_date: Optional end date filter
         limit: Optional limit on number of records
+        order_desc: With limit, take the most recent records instead of the oldest
     
     Returns:
         pandas DataFrame with OHLCV data ordered by date ascending
@@ -261,9 +413,41 @@ def get_ohlcv_data(
         >>> end = datetime.now()
         >>> start = end - timedelta(days=30)
         >>> df = get_ohlcv_data('ETHUSDT', start_date=start, end_date=end)
+        
+        >>> last_60 = get_ohlcv_data('BTCUSDT', limit=60, order_desc=True)
+    """
+    connector = get_connector()
+    return connector.get_ohlcv_data(symbol, start_date, end_date, limit, order_desc)
+
+
+def has_min_data(symbol: str, min_records: int) -> bool:
+    """
+    Convenience function to check that a symbol has at least min_records records
+    
+    Args:
+        symbol: Cryptocurrency symbol (e.g., 'BTCUSDT')
+        min_records: Required number of records
+    
+    Returns:
+        True if enough records exist
+    """
+    connector = get_connector()
+    return connector.has_min_data(symbol, min_records)
+
+
+def get_ohlcv_data_batch(symbols: List[str], limit: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Convenience function to get OHLCV data for several symbols in one query
+    
+    Args:
+        symbols: Cryptocurrency symbols (e.g., ['BTCUSDT', 'ETHUSDT'])
+        limit: Optional number of most recent records to return per symbol
+    
+    Returns:
+        Dict mapping each uppercased symbol to its OHLCV DataFrame
     """
     connector = get_connector()
-    return connector.get_ohlcv_data(symbol, start_date, end_date, limit)
+    return connector.get_ohlcv_data_batch(symbols, limit)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Model settings and helpers shared by predict.py and LSTMPredictor.py
+
+TensorFlow is only imported inside the helpers, so predict.py can import this
+module without paying for TensorFlow on its early exits.
+"""
+
+import os
+import numpy as np
+
+# Opt-in XLA compilation of the Keras train/predict steps (LSTM_JIT_COMPILE=1). Off by
+# default: on GPU an XLA-compiled LSTM can't use the fused CudnnRNN kernel, and on
+# the CPU-only image XLA's while-loop lowering is rarely faster than the stock kernel.
+JIT_COMPILE = os.getenv("LSTM_JIT_COMPILE", "0") == "1"
+
+# LSTM settings spelled out as the values cuDNN's fused kernel requires, so a Keras
+# default change can't silently drop GPU runs to the generic kernel. Only holds while
+# JIT_COMPILE is off: XLA lowers the LSTM itself and never calls cuDNN.
+CUDNN_LSTM_KWARGS = dict(activation='tanh', recurrent_activation='sigmoid',
+                         recurrent_dropout=0.0, unroll=False, use_bias=True)
+
+# INT8 calibration windows: evenly spaced over the whole history plus the most recent
+# ones, so activation ranges cover today's price level and not just the oldest prices
+CALIBRATION_WINDOWS = 200
+CALIBRATION_RECENT_WINDOWS = 20
+# A quantized export is only used if its validation MAE is at most this fraction
+# worse than the float model's
+QUANTIZED_MAX_MAE_INCREASE = 0.1
+
+
+def make_datasets(X_train, y_train, X_val, y_val, batch_size):
+    """Build the (train, validation) tf.data pipelines over in-memory arrays
+
+    The training set is cached and reshuffled every epoch, as fit() does for NumPy
+    input; both are prefetched so batching overlaps training.
+    """
+    import tensorflow as tf
+
+    train_ds = (tf.data.Dataset.from_tensor_slices((X_train, y_train))
+                .cache()
+                .shuffle(len(X_train))
+                .batch(batch_size)
+                .prefetch(tf.data.AUTOTUNE))
+    val_ds = (tf.data.Dataset.from_tensor_slices((X_val, y_val))
+              .batch(batch_size)
+              .cache()
+              .prefetch(tf.data.AUTOTUNE))
+    return train_ds, val_ds
+
+
+def calibration_windows(X, count=CALIBRATION_WINDOWS, recent=CALIBRATION_RECENT_WINDOWS):
+    """Pick representative-dataset windows from X (oldest first): `count` evenly spaced plus the last `recent`"""
+    idx = np.linspace(0, len(X) - 1, num=min(count, len(X))).round().astype(int)
+    idx = np.union1d(idx, np.arange(max(0, len(X) - recent), len(X)))
+    return np.ascontiguousarray(X[idx], dtype=np.float32)
+
+
+def check_quantization(y_true, y_float, y_quant, max_increase=QUANTIZED_MAX_MAE_INCREASE):
+    """Compare a quantized model's predictions with the float model's on held-out targets
+    
+    Returns (acceptable, float MAE, quantized MAE).
+    """
+    y_true = np.ravel(y_true)
+    mae_float = float(np.mean(np.abs(np.ravel(y_float) - y_true)))
+    mae_quant = float(np.mean(np.abs(np.ravel(y_quant) - y_true)))
+    return mae_quant <= mae_float * (1 + max_increase), mae_float, mae_quant
@@ -3,23 +3,26 @@
 import os
 import sys
 import json
-import pickle
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import pandas as pd
 from datetime import datetime, timedelta
-from sklearn.preprocessing import MinMaxScaler
-from tensorflow.keras.models import Sequential, load_model, save_model
-from tensorflow.keras.layers import LSTM, Dense, Dropout
-from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
-from database_connector import get_ohlcv_data
+from database_connector import get_ohlcv_data, get_ohlcv_data_batch, has_min_data
+from lstm_common import CUDNN_LSTM_KWARGS, JIT_COMPILE, calibration_windows, check_quantization, make_datasets
 import warnings
 warnings.filterwarnings('ignore')
 
+# TensorFlow is imported lazily inside the functions that need it, so early
+# exits (bad symbol, no data) don't pay its multi-second import
+
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 MODELS_DIR = os.path.join(SCRIPT_DIR, "lstm_models")
 META_SUFFIX = "_meta.json"
 # Retrain if model older than this many days OR if DB has newer data
 RETRAIN_DAYS = int(os.getenv("LSTM_RETRAIN_DAYS", "7"))
+# TFLite GPU delegate tried for the float16 model; if it can't be loaded (e.g. the
+# CPU-only Docker image) inference stays on the CPU INT8 model
+GPU_DELEGATE_LIB = os.getenv("LSTM_TFLITE_GPU_DELEGATE", "libtensorflowlite_gpu_delegate.so")
 
 # Configuration (matching train_model.py)
 LOOKBACK_PERIOD = 60  # 60-day lookback sequences
@@ -27,108 +30,351 @@ TRAIN_SPLIT = 0.7  # 70% for training, 30% for validation
 EPOCHS = 50
 BATCH_SIZE = 32
 LSTM_UNITS = 50
+LSTM_LAYERS = 1  # Stacked LSTM layers; older models used 3
 DROPOUT_RATE = 0.2
+# Target weight sparsity for magnitude pruning of the LSTM layers during training,
+# e.g. 0.7. Unset disables pruning; needs the tensorflow-model-optimization package.
+PRUNE_SPARSITY = float(os.getenv("LSTM_PRUNE_SPARSITY", "0"))
+
+# Models loaded in this process: symbol -> (.h5 mtime, (model, scaler, lookback_period)).
+# Lets --serve and multi-symbol runs reuse a model until its files change on disk.
+_loaded_models = {}
 
 
 def normalize_data(df):
-    """Normalize OHLCV data using MinMaxScaler"""
+    """Min-max normalize OHLCV data; the scaler is a {'min', 'scale'} dict of per-column arrays"""
     features = ['open', 'high', 'low', 'close', 'volume']
-    data = df[features].values
-    scaler = MinMaxScaler(feature_range=(0, 1))
-    scaled_data = scaler.fit_transform(data)
-    return scaled_data, scaler
+    # float32 throughout: it is what the model consumes, so no cast copy later
+    data = df[features].to_numpy(dtype=np.float32)
+    data_min = data.min(axis=0)
+    data_range = data.max(axis=0) - data_min
+    # Constant columns scale to 0, as MinMaxScaler does
+    scale = (1.0 / np.where(data_range == 0, 1.0, data_range)).astype(np.float32)
+    scaled_data = (data - data_min) * scale
+    return scaled_data, {'min': data_min, 'scale': scale}
+
+
+def save_scaler(scaler, scaler_path):
+    """Write the scaler's min/scale vectors as JSON"""
+    with open(scaler_path, 'w') as f:
+        json.dump({'min': scaler['min'].tolist(), 'scale': scaler['scale'].tolist()}, f)
+
+
+def load_scaler(scaler_path, legacy_scaler_path):
+    """Load the JSON min/scale scaler, falling back to a pickled sklearn MinMaxScaler
+    
+    A legacy pickle is converted to JSON on first load, so later runs skip
+    unpickling (and the sklearn import it pulls in).
+    """
+    if os.path.exists(scaler_path):
+        with open(scaler_path, 'r') as f:
+            params = json.load(f)
+        return {'min': np.asarray(params['min'], dtype=np.float32),
+                'scale': np.asarray(params['scale'], dtype=np.float32)}
+    import pickle
+    
+    with open(legacy_scaler_path, 'rb') as f:
+        scaler = pickle.load(f)
+    scaler = {'min': scaler.data_min_.astype(np.float32), 'scale': scaler.scale_.astype(np.float32)}
+    try:
+        save_scaler(scaler, scaler_path)
+    except OSError as e:
+        print(f"⚠️  Failed to convert scaler to JSON: {e}", file=sys.stderr)
+    return scaler
 
 
 def create_sequences(data, lookback_period, target_column_idx=3):
     """Create sequences for LSTM training"""
-    X, y = [], []
-    for i in range(lookback_period, len(data)):
-        X.append(data[i - lookback_period:i])
-        y.append(data[i, target_column_idx])
-    return np.array(X), np.array(y)
-
-
-def build_lstm_model(input_shape, units=LSTM_UNITS, dropout=DROPOUT_RATE):
-    """Build LSTM model architecture"""
-    model = Sequential([
-        LSTM(units=units, return_sequences=True, input_shape=input_shape),
-        Dropout(dropout),
-        LSTM(units=units, return_sequences=True),
-        Dropout(dropout),
-        LSTM(units=units),
-        Dropout(dropout),
-        Dense(units=1)
-    ])
-    model.compile(optimizer='adam', loss='mean_squared_error', metrics=['mae'])
+    # (N - lookback + 1, features, lookback) window view; drop the last window,
+    # which has no next-day target, and copy once into float32 (samples, lookback, features)
+    windows = sliding_window_view(data, window_shape=lookback_period, axis=0)
+    X = np.ascontiguousarray(windows[:-1].transpose(0, 2, 1), dtype=np.float32)
+    y = np.ascontiguousarray(data[lookback_period:, target_column_idx], dtype=np.float32)
+    return X, y
+
+
+def get_pruning_module():
+    """Return tensorflow_model_optimization if pruning is enabled and installed, else None"""
+    if PRUNE_SPARSITY <= 0:
+        return None
+    try:
+        import tensorflow_model_optimization as tfmot
+        return tfmot
+    except ImportError:
+        print("⚠️  LSTM_PRUNE_SPARSITY is set but tensorflow-model-optimization is not installed; training unpruned", file=sys.stderr)
+        return None
+
+
+def build_lstm_model(input_shape, units=LSTM_UNITS, dropout=DROPOUT_RATE, prune_end_step=None, num_layers=LSTM_LAYERS):
+    """Build LSTM model architecture: num_layers stacked LSTMs, each followed by dropout
+    
+    With prune_end_step, each LSTM layer is wrapped for magnitude pruning that ramps
+    sparsity from 0 to PRUNE_SPARSITY over that many training steps.
+    """
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Input, LSTM, Dense, Dropout
+    
+    # Every layer but the last returns the full sequence for the next one
+    lstm_layers = [
+        LSTM(units=units, return_sequences=i < num_layers - 1, **CUDNN_LSTM_KWARGS)
+        for i in range(num_layers)
+    ]
+    tfmot = get_pruning_module() if prune_end_step else None
+    if tfmot is not None:
+        schedule = tfmot.sparsity.keras.PolynomialDecay(
+            initial_sparsity=0.0, final_sparsity=PRUNE_SPARSITY, begin_step=0, end_step=prune_end_step
+        )
+        lstm_layers = [tfmot.sparsity.keras.prune_low_magnitude(layer, pruning_schedule=schedule)
+                       for layer in lstm_layers]
+    
+    layers = [Input(shape=input_shape)]
+    for layer in lstm_layers:
+        layers += [layer, Dropout(dropout)]
+    layers.append(Dense(units=1))
+    
+    model = Sequential(layers)
+    model.compile(optimizer='adam', loss='mean_squared_error', metrics=['mae'], jit_compile=JIT_COMPILE)
     return model
 
 
+class TFLitePredictor:
+    """Single-sequence inference through a quantized TFLite model
+    
+    Full-integer models take int8 input and produce int8 output; the sequence is
+    quantized and the prediction dequantized with the tensors' (scale, zero_point).
+    Dynamic-range models keep float32 input/output and pass straight through.
+    """
+
+    def __init__(self, tflite_path, delegates=None):
+        import tensorflow as tf
+        
+        self._interpreter = tf.lite.Interpreter(model_path=tflite_path, num_threads=1,
+                                                experimental_delegates=delegates)
+        self._interpreter.allocate_tensors()
+        input_details = self._interpreter.get_input_details()[0]
+        output_details = self._interpreter.get_output_details()[0]
+        self._input_index = input_details['index']
+        self._output_index = output_details['index']
+        self._input_dtype = input_details['dtype']
+        self._input_quantization = input_details['quantization']
+        self._output_dtype = output_details['dtype']
+        self._output_quantization = output_details['quantization']
+        self.lookback_period = int(input_details['shape'][1])
+
+    def __call__(self, sequence, training=False):
+        sequence = np.asarray(sequence, dtype=np.float32)
+        if self._input_dtype == np.int8:
+            scale, zero_point = self._input_quantization
+            sequence = np.clip(np.round(sequence / scale + zero_point), -128, 127).astype(np.int8)
+        self._interpreter.set_tensor(self._input_index, sequence)
+        self._interpreter.invoke()
+        output = self._interpreter.get_tensor(self._output_index)
+        if self._output_dtype == np.int8:
+            scale, zero_point = self._output_quantization
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
+
+class KerasPredictor:
+    """Keras model forward pass traced once into a tf.function (XLA-compiled if JIT_COMPILE)
+    
+    A trace or compile failure is not a broken model: it falls back to a plain
+    tf.function, then to calling the model eagerly, instead of raising into the
+    caller's load-or-retrain logic.
+    """
+
+    def __init__(self, model, lookback_period):
+        import tensorflow as tf
+        
+        signature = [tf.TensorSpec((None, lookback_period, 5), tf.float32)]
+        warmup = tf.zeros((1, lookback_period, 5), dtype=tf.float32)
+        self._infer = lambda x: model(x, training=False)
+        for jit_compile in ([True, False] if JIT_COMPILE else [False]):
+            infer = tf.function(lambda x: model(x, training=False), jit_compile=jit_compile,
+                                input_signature=signature)
+            try:
+                # Trace and compile now so the first prediction doesn't pay for it
+                infer(warmup)
+            except Exception as e:
+                print(f"⚠️  Tracing the forward pass failed (jit_compile={jit_compile}): {e}", file=sys.stderr)
+                continue
+            self._infer = infer
+            break
+
+    def __call__(self, sequence, training=False):
+        return self._infer(sequence).numpy()
+
+
+def export_tflite(model, tflite_path, X_calib, X_val, y_val):
+    """Write a quantized TFLite copy of the model for inference, if it is accurate enough
+    
+    Full-integer INT8 is tried first, with activation ranges calibrated on X_calib
+    (see lstm_common.calibration_windows). It is kept only if its MAE on the
+    validation windows is within QUANTIZED_MAX_MAE_INCREASE of the Keras model's;
+    otherwise, or if the converter can't lower every op to INT8 kernels, the
+    dynamic-range model (int8 weights, float32 input/output) is checked the same
+    way. If neither passes, no TFLite file is left and inference uses the .h5.
+    """
+    import tensorflow as tf
+    
+    def convert(full_integer):
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if full_integer:
+            converter.representative_dataset = lambda: ([x[np.newaxis]] for x in X_calib)
+            converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+            converter.inference_input_type = tf.int8
+            converter.inference_output_type = tf.int8
+        return converter.convert()
+    
+    y_float = model(X_val, training=False).numpy()
+    tmp_path = tflite_path + ".tmp"
+    for label, full_integer in (("INT8", True), ("dynamic-range", False)):
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(convert(full_integer))
+            predictor = TFLitePredictor(tmp_path)
+            y_quant = np.concatenate([predictor(x[np.newaxis]) for x in X_val])
+        except Exception as e:
+            print(f"⚠️  {label} TFLite export failed: {e}", file=sys.stderr)
+            continue
+        ok, mae_float, mae_quant = check_quantization(y_val, y_float, y_quant)
+        if ok:
+            os.replace(tmp_path, tflite_path)
+            print(f"Saved {label} TFLite model: {tflite_path} (val MAE {mae_quant:.5f}, Keras {mae_float:.5f})", file=sys.stderr)
+            return
+        print(f"⚠️  {label} TFLite model rejected: val MAE {mae_quant:.5f}, Keras {mae_float:.5f}", file=sys.stderr)
+    
+    # Nothing passed: don't leave an export of an older model behind
+    for path in (tmp_path, tflite_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def export_tflite_fp16(model, tflite_path):
+    """Write a float16-weight TFLite copy of the model for the GPU delegate"""
+    import tensorflow as tf
+    
+    try:
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+        with open(tflite_path, 'wb') as f:
+            f.write(converter.convert())
+        print(f"Saved float16 TFLite model: {tflite_path}", file=sys.stderr)
+    except Exception as e:
+        print(f"⚠️  Failed to export float16 TFLite model: {e}", file=sys.stderr)
+
+
+def load_gpu_predictor(tflite_path):
+    """Open the float16 TFLite model on the GPU delegate, or return None if unavailable"""
+    import tensorflow as tf
+    
+    try:
+        delegate = tf.lite.experimental.load_delegate(GPU_DELEGATE_LIB)
+        return TFLitePredictor(tflite_path, delegates=[delegate])
+    except Exception as e:
+        print(f"GPU delegate unavailable ({e}), using CPU model", file=sys.stderr)
+        return None
+
+
+def check_needs_retrain(symbol, df, meta_path):
+    """Decide from the metadata JSON alone whether a saved model is stale (no TensorFlow needed)"""
+    try:
+        if not os.path.exists(meta_path):
+            # No metadata file => safer to retrain
+            print(f"No metadata found for {symbol} -> retrain recommended", file=sys.stderr)
+            return True
+        
+        with open(meta_path, 'r') as mf:
+            meta = json.load(mf)
+        # Compare DB last date with metadata last_data_date
+        db_last = pd.to_datetime(df['date'].max())
+        meta_last = pd.to_datetime(meta.get('last_data_date')) if meta.get('last_data_date') else None
+        last_trained = pd.to_datetime(meta.get('last_trained')) if meta.get('last_trained') else None
+
+        if meta_last is None:
+            return True
+        if db_last > meta_last:
+            print(f"Detected newer DB data (db:{db_last.date()} > meta:{meta_last.date()}) -> retrain needed", file=sys.stderr)
+            return True
+        if last_trained is not None and (datetime.utcnow() - pd.to_datetime(last_trained).to_pydatetime()) > timedelta(days=RETRAIN_DAYS):
+            print(f"Model older than {RETRAIN_DAYS} days (last_trained={last_trained.date()}) -> retrain recommended", file=sys.stderr)
+            return True
+        return False
+    except Exception as e:
+        print(f"⚠️  Failed to read meta for {symbol}: {e} -> retrain recommended", file=sys.stderr)
+        return True
+
+
 def train_model_if_needed(symbol, df):
     """Train a model if it doesn't exist, return model, scaler, and lookback_period"""
     model_path = os.path.join(MODELS_DIR, f"{symbol}_model.h5")
-    scaler_path = os.path.join(MODELS_DIR, f"{symbol}_scaler.pkl")
+    tflite_path = os.path.join(MODELS_DIR, f"{symbol}_model.tflite")
+    tflite_fp16_path = os.path.join(MODELS_DIR, f"{symbol}_model_fp16.tflite")
+    scaler_path = os.path.join(MODELS_DIR, f"{symbol}_scaler.json")
+    legacy_scaler_path = os.path.join(MODELS_DIR, f"{symbol}_scaler.pkl")
     
     # Check if model exists
     meta_path = os.path.join(MODELS_DIR, f"{symbol}{META_SUFFIX}")
-    model_exists = os.path.exists(model_path) and os.path.exists(scaler_path)
+    scaler_exists = os.path.exists(scaler_path) or os.path.exists(legacy_scaler_path)
+    model_exists = os.path.exists(model_path) and scaler_exists
     if model_exists:
-        try:
-            print(f"Loading pre-trained model for {symbol}...", file=sys.stderr)
-            model = load_model(model_path)
-            with open(scaler_path, 'rb') as f:
-                scaler = pickle.load(f)
-
-            # Get lookback period from model
-            input_shape = model.input_shape
-            if input_shape and len(input_shape) >= 2:
-                lookback_period = int(input_shape[1] if input_shape[1] else input_shape[0])
-            else:
-                lookback_period = LOOKBACK_PERIOD
-
-            # Load metadata if available to decide if retraining is needed
-            needs_retrain = False
+        # Check freshness before loading: a stale model would be discarded anyway
+        if check_needs_retrain(symbol, df, meta_path):
+            print(f"Retraining model for {symbol} due to freshness policy...", file=sys.stderr)
+            # fall through to training logic below
+        else:
+            cached = _loaded_models.get(symbol)
+            if cached is not None and cached[0] == os.path.getmtime(model_path):
+                return cached[1]
             try:
-                if os.path.exists(meta_path):
-                    with open(meta_path, 'r') as mf:
-                        meta = json.load(mf)
-                    # Compare DB last date with metadata last_data_date
-                    db_last = pd.to_datetime(df['date'].max())
-                    meta_last = pd.to_datetime(meta.get('last_data_date')) if meta.get('last_data_date') else None
-                    last_trained = pd.to_datetime(meta.get('last_trained')) if meta.get('last_trained') else None
-
-                    if meta_last is None:
-                        needs_retrain = True
-                    else:
-                        if db_last > meta_last:
-                            print(f"Detected newer DB data (db:{db_last.date()} > meta:{meta_last.date()}) -> retrain needed", file=sys.stderr)
-                            needs_retrain = True
-                        elif last_trained is not None and (datetime.utcnow() - pd.to_datetime(last_trained).to_pydatetime()) > timedelta(days=RETRAIN_DAYS):
-                            print(f"Model older than {RETRAIN_DAYS} days (last_trained={last_trained.date()}) -> retrain recommended", file=sys.stderr)
-                            needs_retrain = True
+                print(f"Loading pre-trained model for {symbol}...", file=sys.stderr)
+                scaler = load_scaler(scaler_path, legacy_scaler_path)
+                
+                # Prefer the TFLite copies unless the .h5 was rewritten after them
+                # (LSTMPredictor also writes {symbol}_model.h5): float16 on the GPU
+                # delegate if one loads, else INT8 on the CPU
+                model = None
+                model_mtime = os.path.getmtime(model_path)
+                if os.path.exists(tflite_fp16_path) and os.path.getmtime(tflite_fp16_path) >= model_mtime:
+                    model = load_gpu_predictor(tflite_fp16_path)
+                if model is None and os.path.exists(tflite_path) and os.path.getmtime(tflite_path) >= model_mtime:
+                    model = TFLitePredictor(tflite_path)
+                if model is not None:
+                    lookback_period = model.lookback_period
                 else:
-                    # No metadata file => safer to retrain
-                    print(f"No metadata found for {symbol} -> retrain recommended", file=sys.stderr)
-                    needs_retrain = True
-            except Exception as e:
-                print(f"⚠️  Failed to read meta for {symbol}: {e} -> retrain recommended", file=sys.stderr)
-                needs_retrain = True
+                    from tensorflow.keras.models import load_model
+                    
+                    model = load_model(model_path)
+
+                    # Get lookback period from model
+                    input_shape = model.input_shape
+                    if input_shape and len(input_shape) >= 2:
+                        lookback_period = int(input_shape[1] if input_shape[1] else input_shape[0])
+                    else:
+                        lookback_period = LOOKBACK_PERIOD
+                    model = KerasPredictor(model, lookback_period)
 
-            if needs_retrain:
-                print(f"Retraining model for {symbol} due to freshness policy...", file=sys.stderr)
-                # fall through to training logic below
-            else:
                 print(f"Loaded pre-trained model (lookback={lookback_period})", file=sys.stderr)
+                _loaded_models[symbol] = (model_mtime, (model, scaler, lookback_period))
                 return model, scaler, lookback_period
-        except Exception as e:
-            print(f"Error loading model: {e}. Will train new one.", file=sys.stderr)
+            except Exception as e:
+                print(f"Error loading model: {e}. Will train new one.", file=sys.stderr)
     
     # Model doesn't exist or failed to load, train a new one
+    from tensorflow.keras.models import save_model
+    from tensorflow.keras.callbacks import EarlyStopping
+    
     print(f"Training new model for {symbol}...", file=sys.stderr)
     
-    # Check minimum data requirement
+    # Check minimum data requirement before pulling the full history
     min_required = LOOKBACK_PERIOD + 50
-    if len(df) < min_required:
-        raise ValueError(f"Insufficient data for training. Need at least {min_required} records, got {len(df)}")
+    if not has_min_data(symbol, min_required):
+        raise ValueError(f"Insufficient data for training. Need at least {min_required} records")
+    
+    # Training needs the full history, not just the recent prediction window
+    df = get_ohlcv_data(symbol)
     
     # Normalize data
     scaled_data, scaler = normalize_data(df)
@@ -143,35 +389,40 @@ def train_model_if_needed(symbol, df):
     
     # Build model
     input_shape = (LOOKBACK_PERIOD, 5)
-    model = build_lstm_model(input_shape, LSTM_UNITS, DROPOUT_RATE)
+    tfmot = get_pruning_module()
+    prune_end_step = int(np.ceil(len(X_train) / BATCH_SIZE)) * EPOCHS if tfmot is not None else None
+    model = build_lstm_model(input_shape, LSTM_UNITS, DROPOUT_RATE, prune_end_step=prune_end_step)
     
-    # Prepare callbacks
+    # Prepare callbacks: EarlyStopping keeps the best weights in memory, so the
+    # model is written to disk once after training rather than checkpointed per epoch
     os.makedirs(MODELS_DIR, exist_ok=True)
-    checkpoint_path = os.path.join(MODELS_DIR, f"{symbol}_checkpoint.h5")
     callbacks = [
-        EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True, verbose=0),
-        ModelCheckpoint(checkpoint_path, monitor='val_loss', save_best_only=True, verbose=0)
+        EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True, verbose=0)
     ]
+    if tfmot is not None:
+        callbacks.append(tfmot.sparsity.keras.UpdatePruningStep())
+    
+    train_ds, val_ds = make_datasets(X_train, y_train, X_val, y_val, BATCH_SIZE)
     
     # Train model
     print(f"Training with {len(X_train)} training samples, {len(X_val)} validation samples...", file=sys.stderr)
     history = model.fit(
-        X_train, y_train,
-        validation_data=(X_val, y_val),
+        train_ds,
+        validation_data=val_ds,
         epochs=EPOCHS,
-        batch_size=BATCH_SIZE,
         callbacks=callbacks,
         verbose=0
     )
     
-    # Load best weights
-    if os.path.exists(checkpoint_path):
-        model.load_weights(checkpoint_path)
+    # Remove the pruning wrappers, leaving plain LSTM layers with sparse weights
+    if tfmot is not None:
+        model = tfmot.sparsity.keras.strip_pruning(model)
     
     # Save model and scaler
     save_model(model, model_path)
-    with open(scaler_path, 'wb') as f:
-        pickle.dump(scaler, f)
+    save_scaler(scaler, scaler_path)
+    export_tflite(model, tflite_path, calibration_windows(X), X_val, y_val)
+    export_tflite_fp16(model, tflite_fp16_path)
     # Save metadata about training and data freshness
     try:
         meta = {
@@ -189,75 +440,116 @@ def train_model_if_needed(symbol, df):
     
     print(f"Model trained and saved: {model_path}", file=sys.stderr)
     
+    if os.path.exists(model_path):
+        _loaded_models[symbol] = (os.path.getmtime(model_path), (model, scaler, LOOKBACK_PERIOD))
     return model, scaler, LOOKBACK_PERIOD
 
 
-def prepare_prediction_data(df, scaler, lookback_period):
-    features = ['open', 'high', 'low', 'close', 'volume']
-    
-    if len(df) < lookback_period:
-        raise ValueError(f"Insufficient data. Need at least {lookback_period} days, got {len(df)}")
+def prepare_prediction_data(data, scaler, lookback_period):
+    """Normalize the last lookback_period rows of a (days, 5) OHLCV float32 array into a model input"""
+    if len(data) < lookback_period:
+        raise ValueError(f"Insufficient data. Need at least {lookback_period} days, got {len(data)}")
     
-    last_n_days = df[features].tail(lookback_period).values
-    normalized = scaler.transform(last_n_days)
+    last_n_days = data[-lookback_period:]
+    normalized = np.subtract(last_n_days, scaler['min'])
+    np.multiply(normalized, scaler['scale'], out=normalized)
     sequence = normalized.reshape(1, lookback_period, 5)
     
     return sequence
 
 
 def predict_next_close(model, sequence, scaler):
-    prediction_normalized = model.predict(sequence, verbose=0)
-    
-    dummy = np.zeros((1, 5))
-    dummy[0, 3] = prediction_normalized[0, 0]
+    # Direct forward pass (Keras model or TFLite interpreter): model.predict builds a
+    # data adapter and predict loop on every call, which dominates a single inference
+    prediction_normalized = np.asarray(model(sequence.astype(np.float32, copy=False), training=False))
     
-    predicted_values = scaler.inverse_transform(dummy)
-    predicted_close = float(predicted_values[0, 3])
+    # Undo the min-max scaling for the close column only, in double precision
+    predicted_close = float(prediction_normalized[0, 0]) / float(scaler['scale'][3]) + float(scaler['min'][3])
     
     return predicted_close
 
 
+def predict_symbol(symbol, df):
+    """Load (or train) the symbol's model and predict the next close from its recent window df"""
+    if df.empty:
+        raise ValueError(f"No data found for symbol {symbol}")
+    
+    # Train model if needed (or load existing)
+    model, scaler, lookback_period = train_model_if_needed(symbol, df)
+    
+    # A loaded model may use a longer lookback than the window fetched
+    if len(df) < lookback_period:
+        df = get_ohlcv_data(symbol, limit=lookback_period, order_desc=True)
+    
+    # Check if we have enough data for prediction
+    if len(df) < lookback_period:
+        raise ValueError(f"Insufficient data. Need at least {lookback_period} days, got {len(df)}")
+    
+    # Prepare last N days for prediction, sliced on the numpy array
+    data = df[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=np.float32)
+    sequence = prepare_prediction_data(data, scaler, lookback_period)
+    predicted_close = predict_next_close(model, sequence, scaler)
+    
+    return {
+        "symbol": symbol,
+        "predicted_close": round(predicted_close, 2)
+    }
+
+
+def serve():
+    """
+    Long-lived prediction loop: one symbol per stdin line, one JSON result per stdout line
+    
+    TensorFlow is imported and each symbol's model loaded once for the life of the
+    process, instead of once per prediction. Lines may be a bare symbol or a JSON
+    object like {"symbol": "BTCUSDT"}.
+    """
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            symbol = json.loads(line)['symbol'] if line.startswith('{') else line
+            symbol = symbol.upper()
+            df = get_ohlcv_data(symbol, limit=LOOKBACK_PERIOD, order_desc=True)
+            result = predict_symbol(symbol, df)
+        except Exception as e:
+            result = {"error": str(e)}
+        print(json.dumps(result), flush=True)
+
+
 def main():
     if len(sys.argv) < 2:
         print(json.dumps({
             "error": "Symbol argument required",
-            "usage": "python predict.py <SYMBOL>",
+            "usage": "python predict.py <SYMBOL> [<SYMBOL> ...] | python predict.py --serve",
             "example": "python predict.py BTCUSDT"
         }))
         sys.exit(1)
     
-    symbol = sys.argv[1].upper()
+    if sys.argv[1] == '--serve':
+        serve()
+        return
+    
+    symbols = [arg.upper() for arg in sys.argv[1:]]
     
     try:
-        # Get data first
-        df = get_ohlcv_data(symbol)
-        
-        if df.empty:
-            print(json.dumps({
-                "error": f"No data found for symbol {symbol}"
-            }))
-            sys.exit(1)
-        
-        # Train model if needed (or load existing)
-        model, scaler, lookback_period = train_model_if_needed(symbol, df)
-        
-        # Check if we have enough data for prediction
-        if len(df) < lookback_period:
-            print(json.dumps({
-                "error": f"Insufficient data. Need at least {lookback_period} days, got {len(df)}"
-            }))
-            sys.exit(1)
-        
-        # Prepare last N days for prediction
-        df = df.tail(lookback_period).reset_index(drop=True)
-        
-        sequence = prepare_prediction_data(df, scaler, lookback_period)
-        predicted_close = predict_next_close(model, sequence, scaler)
-        
-        result = {
-            "symbol": symbol,
-            "predicted_close": round(predicted_close, 2)
-        }
+        if len(symbols) == 1:
+            # Get data first: only the most recent window is needed to predict (and to
+            # check model freshness); full history is fetched only if training
+            symbol = symbols[0]
+            df = get_ohlcv_data(symbol, limit=LOOKBACK_PERIOD, order_desc=True)
+            result = predict_symbol(symbol, df)
+        else:
+            # Several symbols: one query for all recent windows, and TensorFlow is
+            # imported once for the whole batch instead of once per process
+            windows = get_ohlcv_data_batch(symbols, limit=LOOKBACK_PERIOD)
+            result = []
+            for symbol in symbols:
+                try:
+                    result.append(predict_symbol(symbol, windows[symbol]))
+                except Exception as e:
+                    result.append({"symbol": symbol, "error": str(e)})
         
         print(json.dumps(result, indent=2))
         
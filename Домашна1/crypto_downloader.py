@@ -3,8 +3,10 @@
 Stable Binance-only downloader (Version B2, 10 workers, timed, top 1000 by quoteVolume)
 """
 
-import requests, time, os
+import requests, time, os, threading
+import orjson
 import pandas as pd
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
@@ -15,21 +17,94 @@ MAX_WORKERS = 10
 MAX_RETRIES = 5
 RETRY_DELAY = 3
 
+# One pooled session shared by all workers, so TCP/TLS connections are reused
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=MAX_WORKERS,
+                                      pool_maxsize=MAX_WORKERS*2, max_retries=0))
+
+# Request weight of the Binance endpoints used here
+EXCHANGE_INFO_WEIGHT = 20
+ALL_TICKERS_WEIGHT = 80
+KLINES_WEIGHT = 2
+
+# =====================================================================================
+# REQUEST WEIGHT
+# Binance counts weight per IP in fixed one-minute windows. Workers reserve each
+# request's weight before sending it and, once 90% of the limit is spent, sleep until
+# the next minute. A 429 pauses every worker for Retry-After; a 418 (IP ban) is never
+# retried, since retrying only extends the ban.
+# =====================================================================================
+class BinanceBanError(RuntimeError):
+    pass
+
+class WeightLimiter:
+    def __init__(self, limit=1200, budget_fraction=0.9):
+        self.lock = threading.Lock()
+        self.budget_fraction = budget_fraction
+        self.budget = int(limit * budget_fraction)
+        self.window = None
+        self.used = 0
+        self.paused_until = 0.0
+        self.banned = False
+
+    def configure(self, rate_limits):
+        # Size the budget from exchangeInfo's rateLimits
+        for rl in rate_limits:
+            if rl.get("rateLimitType") == "REQUEST_WEIGHT" and rl.get("interval") == "MINUTE" and rl.get("intervalNum") == 1:
+                with self.lock:
+                    self.budget = int(int(rl["limit"]) * self.budget_fraction)
+
+    def acquire(self, weight):
+        while True:
+            with self.lock:
+                if self.banned:
+                    raise BinanceBanError("Binance banned this IP (HTTP 418)")
+                now = time.time()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    window = int(now // 60)
+                    if window != self.window:
+                        self.window, self.used = window, 0
+                    if self.used + min(weight, self.budget) <= self.budget:
+                        self.used += weight
+                        return
+                    wait = (window + 1) * 60 - now + 0.5
+            time.sleep(wait)
+
+    def check_response(self, r, default_retry_after):
+        # Returns True if the request got a 429 and should be retried
+        retry_after = float(r.headers.get("Retry-After", default_retry_after))
+        header = r.headers.get("X-MBX-USED-WEIGHT-1M")
+        with self.lock:
+            if header is not None and self.window == int(time.time() // 60):
+                self.used = max(self.used, int(header))
+            if r.status_code == 418:
+                self.banned = True
+                raise BinanceBanError(f"Binance banned this IP (HTTP 418); retry after {retry_after:.0f}s")
+            if r.status_code == 429:
+                self.paused_until = max(self.paused_until, time.time() + retry_after)
+                return True
+        return False
+
+RATE_LIMITER = WeightLimiter()
+
 # =====================================================================================
 # SAFE GET
 # =====================================================================================
-def safe_get(session, url, params=None, timeout=20):
+def safe_get(session, url, params=None, timeout=20, weight=1):
     backoff = RETRY_DELAY
     for attempt in range(1, MAX_RETRIES+1):
         try:
+            RATE_LIMITER.acquire(weight)
             r = session.get(url, params=params, timeout=timeout)
-            if r.status_code == 429:
-                time.sleep(backoff)
+            if RATE_LIMITER.check_response(r, backoff):
                 backoff *= 1.7
                 continue
             r.raise_for_status()
-            time.sleep(0.15)
             return r
+        except BinanceBanError:
+            raise
         except Exception:
             time.sleep(backoff)
             backoff *= 1.7
@@ -39,16 +114,18 @@ def safe_get(session, url, params=None, timeout=20):
 # EXCHANGE INFO & TICKERS
 # =====================================================================================
 def get_exchange_info(session):
-    r = safe_get(session, f"{BASE_URL}/api/v3/exchangeInfo")
+    r = safe_get(session, f"{BASE_URL}/api/v3/exchangeInfo", weight=EXCHANGE_INFO_WEIGHT)
     if not r:
         raise RuntimeError("Failed exchangeInfo")
-    return r.json()["symbols"]
+    info = orjson.loads(r.content)
+    RATE_LIMITER.configure(info.get("rateLimits", []))
+    return info["symbols"]
 
 def get_all_tickers(session):
-    r = safe_get(session, f"{BASE_URL}/api/v3/ticker/24hr")
+    r = safe_get(session, f"{BASE_URL}/api/v3/ticker/24hr", weight=ALL_TICKERS_WEIGHT)
     if not r:
         raise RuntimeError("Failed tickers")
-    return r.json()
+    return orjson.loads(r.content)
 
 # =====================================================================================
 # FETCH OHLCV DAILY HISTORY
@@ -61,15 +138,14 @@ def fetch_ohlcv(session, symbol):
 
     while True:
         params = {"symbol": symbol, "interval": "1d", "limit": limit, "startTime": since}
-        r = safe_get(session, f"{BASE_URL}/api/v3/klines", params=params)
+        r = safe_get(session, f"{BASE_URL}/api/v3/klines", params=params, weight=KLINES_WEIGHT)
         if not r: break
-        batch = r.json()
+        batch = orjson.loads(r.content)
         if not batch: break
         all_rows.extend(batch)
         last_ts = batch[-1][0]
         if len(batch) < limit: break
         since = last_ts + timeframe_ms
-        time.sleep(0.2)
 
     if not all_rows: return None
 
@@ -85,54 +161,43 @@ def fetch_ohlcv(session, symbol):
     df["symbol"] = symbol
     return df
 
-# =====================================================================================
-# FETCH TICKER 24H
-# =====================================================================================
-def fetch_ticker(session, symbol):
-    r = safe_get(session, f"{BASE_URL}/api/v3/ticker/24hr", params={"symbol":symbol})
-    return r.json() if r else {}
-
 # =====================================================================================
 # PROCESS ONE SYMBOL (TRADING PAIR)
 # =====================================================================================
-def process_symbol(s):
-    session = requests.Session()
-    try:
-        if s["status"] != "TRADING":
-            return None
-        symbol = s["symbol"]
-        df = fetch_ohlcv(session, symbol)
-        if df is None:
-            return None
-        ticker = fetch_ticker(session, symbol)
-        df["LastPrice_24h"] = float(ticker.get("lastPrice") or 0)
-        df["Volume_24h"] = float(ticker.get("volume") or 0)
-        df["QuoteVolume_24h"] = float(ticker.get("quoteVolume") or 0)
-        df["High_24h"] = float(ticker.get("highPrice") or 0)
-        df["Low_24h"] = float(ticker.get("lowPrice") or 0)
-        df["BaseAsset"] = s["baseAsset"]
-        df["QuoteAsset"] = s["quoteAsset"]
-        df["SymbolUsed"] = symbol
-        return df
-    finally:
-        session.close()
+def process_symbol(session, s, ticker):
+    if s["status"] != "TRADING":
+        return None
+    symbol = s["symbol"]
+    df = fetch_ohlcv(session, symbol)
+    if df is None:
+        return None
+    df["LastPrice_24h"] = float(ticker.get("lastPrice") or 0)
+    df["Volume_24h"] = float(ticker.get("volume") or 0)
+    df["QuoteVolume_24h"] = float(ticker.get("quoteVolume") or 0)
+    df["High_24h"] = float(ticker.get("highPrice") or 0)
+    df["Low_24h"] = float(ticker.get("lowPrice") or 0)
+    df["BaseAsset"] = s["baseAsset"]
+    df["QuoteAsset"] = s["quoteAsset"]
+    df["SymbolUsed"] = symbol
+    return df
 
 # =====================================================================================
 # MAIN
 # =====================================================================================
 def main():
     start_time = time.time()
-    session = requests.Session()
+    session = SESSION
     try:
         symbols = get_exchange_info(session)
         tickers = get_all_tickers(session)
         print(f"🪙 Total symbols: {len(symbols)}")
 
-        # Map symbol → quoteVolume
-        ticker_map = {t["symbol"]: float(t.get("quoteVolume") or 0) for t in tickers}
+        # Map symbol → 24h ticker (reused by the workers instead of one request per symbol)
+        ticker_map = {t["symbol"]: t for t in tickers}
         # Rank symbols by quoteVolume descending
         symbols_sorted = sorted([s for s in symbols if s["status"]=="TRADING"],
-                                key=lambda s: ticker_map.get(s["symbol"],0), reverse=True)
+                                key=lambda s: float(ticker_map.get(s["symbol"], {}).get("quoteVolume") or 0),
+                                reverse=True)
         # Take top 1000
         top_symbols = symbols_sorted[:1000]
         print(f"📌 Top 1000 symbols selected based on quoteVolume")
@@ -140,7 +205,7 @@ def main():
         processed = set()
         if os.path.exists(CSV_FILE):
             try:
-                old = pd.read_csv(CSV_FILE, usecols=["SymbolUsed"])
+                old = pd.read_csv(CSV_FILE, usecols=["SymbolUsed"], dtype={"SymbolUsed": str})
                 processed = set(old["SymbolUsed"].unique())
             except: processed = set()
 
@@ -148,7 +213,7 @@ def main():
         print(f"⏳ Remaining symbols to process: {len(to_process)}")
 
         with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            futures = {executor.submit(process_symbol, s): s for s in to_process}
+            futures = {executor.submit(process_symbol, session, s, ticker_map.get(s["symbol"], {})): s for s in to_process}
             completed_count = 0
             for fut in as_completed(futures):
                 df = fut.result()
@@ -159,7 +224,6 @@ def main():
                         df.to_csv(CSV_FILE, mode="a", header=False, index=False)
                     else:
                         df.to_csv(CSV_FILE, index=False)
-                time.sleep(0.2)
 
     finally:
         session.close()